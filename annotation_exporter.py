@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import fitz  # PyMuPDF
+from PyQt6.QtCore import QThread, pyqtSignal
+
+class AnnotationExporter(QThread):
+    """Thread ghi PDF gốc kèm nét vẽ (vector) của từng slide vào nội dung trang"""
+    progress = pyqtSignal(int, int)  # (đã xong, tổng số bước)
+    exported = pyqtSignal(str)  # Đường dẫn file đã xuất
+    failed = pyqtSignal(str)
+    
+    def __init__(self, source_path, output_path, annotations, parent=None):
+        super().__init__(parent)
+        self.source_path = source_path
+        self.output_path = output_path
+        # slide -> danh sách Stroke (tọa độ chuẩn hóa theo chiều rộng slide); nét đã vẽ xong không đổi
+        self.annotations = {slide: list(strokes) for slide, strokes in annotations.items() if strokes}
+        
+    def run(self):
+        """Vẽ nét lên các trang có chú thích rồi lưu; các trang khác được copy nguyên"""
+        doc = None
+        try:
+            doc = fitz.open(self.source_path)
+            pages = sorted(page for page in self.annotations if page < len(doc))
+            total = len(pages) + 1  # Bước cuối là ghi file
+            
+            for done, page_num in enumerate(pages):
+                self._draw_strokes(doc.load_page(page_num), self.annotations[page_num])
+                self.progress.emit(done + 1, total)
+            
+            # Ghi ra file tạm rồi đổi tên, không để lại file hỏng nếu lỗi giữa chừng
+            temp_path = self.output_path + '.tmp'
+            doc.save(temp_path, garbage=1, deflate=True)
+            doc.close()
+            doc = None
+            os.replace(temp_path, self.output_path)
+            self.progress.emit(total, total)
+            self.exported.emit(self.output_path)
+            
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            if doc is not None:
+                doc.close()
+            
+    @staticmethod
+    def _draw_strokes(page, strokes):
+        """Thêm các nét vào nội dung trang dưới dạng đường vector (đầu và góc tròn như khi vẽ)"""
+        rect = page.rect  # Trang như khi hiển thị (đã xoay)
+        scale = rect.width  # Tọa độ nét chuẩn hóa theo chiều rộng slide
+        # Shape vẽ trong hệ tọa độ trang chưa xoay: đổi từng điểm về hệ đó
+        derotate = page.derotation_matrix
+        shape = page.new_shape()
+        for stroke in strokes:
+            if len(stroke) < 2:
+                continue
+            points = [fitz.Point(rect.x0 + x * scale, rect.y0 + y * scale) * derotate
+                      for x, y in zip(stroke.xs, stroke.ys)]
+            color = stroke.color
+            shape.draw_polyline(points)
+            shape.finish(color=(color.redF(), color.greenF(), color.blueF()),
+                         width=stroke.width * scale, lineCap=1, lineJoin=1,
+                         stroke_opacity=color.alphaF(), closePath=False)
+        shape.commit()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPixmap, QPainter
+
+from stroke_history import StrokeHistory
+
+class AnnotationLayer:
+    """Nét vẽ của một slide: lịch sử nét (vector) và ảnh đã vẽ (có thể bị bỏ để tiết kiệm bộ nhớ)"""
+    def __init__(self):
+        self.history = StrokeHistory()
+        self.canvas = None  # QPixmap; None nếu chỉ còn dữ liệu vector
+
+class AnnotationLayers:
+    """Các lớp nét vẽ theo slide, chỉ giữ ảnh của các slide xem gần nhất"""
+    def __init__(self, max_rasters=6):
+        self.max_rasters = max_rasters  # Số slide tối đa giữ ảnh trong bộ nhớ
+        self._layers = {}  # slide -> AnnotationLayer
+        self._rasters = OrderedDict()  # Các slide đang giữ ảnh, theo thứ tự dùng gần nhất
+        self._active = None  # Slide đang hiển thị, chỉ slide này giữ checkpoint hoàn tác
+        
+    def layer(self, slide):
+        """Lấy lớp nét vẽ của slide (tạo mới nếu chưa có)"""
+        layer = self._layers.get(slide)
+        if layer is None:
+            layer = self._layers[slide] = AnnotationLayer()
+        return layer
+        
+    def activate(self, slide, size, transform):
+        """Lấy lớp của slide để hiển thị, có sẵn ảnh đúng kích thước và vị trí slide (transform)"""
+        if self._active != slide:
+            # Checkpoint chỉ dùng khi hoàn tác trên slide đang vẽ: bỏ của slide trước
+            # để bộ nhớ checkpoint không nhân theo số slide còn giữ ảnh
+            previous = self._layers.get(self._active)
+            if previous is not None:
+                previous.history.drop_checkpoints()
+            self._active = slide
+        
+        layer = self.layer(slide)
+        if layer.canvas is None or layer.history.transform != transform:
+            # Slide lâu chưa xem hoặc zoom/pan đã đổi: vẽ lại từ dữ liệu vector
+            layer.canvas = layer.history.rebuild(size, transform)
+        elif layer.canvas.size() != size:
+            # Đổi kích thước nhưng giữ nguyên nét đã vẽ
+            canvas = QPixmap(size)
+            canvas.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(canvas)
+            painter.drawPixmap(0, 0, layer.canvas)
+            painter.end()
+            layer.canvas = canvas
+        
+        self._rasters[slide] = True
+        self._rasters.move_to_end(slide)
+        while len(self._rasters) > self.max_rasters:
+            evicted, _ = self._rasters.popitem(last=False)
+            self._drop_raster(self._layers[evicted])
+        return layer
+        
+    def _drop_raster(self, layer):
+        """Chỉ giữ lại dữ liệu vector của lớp"""
+        layer.canvas = None
+        layer.history.drop_checkpoints()
+        
+    def annotations(self):
+        """Các nét vẽ theo slide (chỉ slide có nét), dùng để xuất file"""
+        return {slide: list(layer.history.strokes)
+                for slide, layer in self._layers.items() if len(layer.history)}
+        
+    def clear(self):
+        """Xóa nét vẽ của tất cả slide"""
+        self._layers.clear()
+        self._rasters.clear()
+        self._active = None
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark chuyển đổi fitz.Pixmap -> QImage
+So sánh đường cũ (PPM -> PIL -> PNG -> QImage) với đường chuyển đổi trực tiếp
+trên trang 1080p và 4K
+"""
+
+import io
+import sys
+import time
+import fitz  # PyMuPDF
+from PIL import Image
+from PyQt6.QtGui import QGuiApplication, QImage, QPixmap
+
+from presentation_viewer import PresentationViewer
+
+SIZES = {
+    '1080p': (1920, 1080),
+    '4K': (3840, 2160),
+}
+
+def make_pixmap(width, height):
+    """Tạo fitz.Pixmap có nội dung (không phải màu trơn) để PNG không nén quá dễ"""
+    doc = fitz.open()
+    page = doc.new_page(width=width, height=height)
+    for i in range(40):
+        page.draw_rect(fitz.Rect(i * 40, i * 20, i * 40 + 600, i * 20 + 300),
+                       color=(i / 40, 0.2, 1 - i / 40), fill=(0.9, i / 40, 0.3))
+        page.insert_text((50 + i * 30, 80 + i * 45), f"Slide benchmark {i}", fontsize=32)
+    pix = page.get_pixmap(alpha=False)
+    doc.close()
+    return pix
+
+def convert_old(pix):
+    """Đường chuyển đổi cũ: PPM -> PIL -> PNG -> QImage"""
+    img = Image.open(io.BytesIO(pix.tobytes("ppm")))
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    image = QImage()
+    image.loadFromData(buffer.getvalue())
+    return image
+
+def convert_new(pix):
+    """Đường chuyển đổi mới: bọc pix.samples trực tiếp"""
+    return PresentationViewer._fitz_pixmap_to_qimage(pix)
+
+def bench(func, pix, repeat):
+    """Trả về thời gian trung bình (ms) của một lần chuyển đổi + QPixmap.fromImage"""
+    func(pix)  # Làm nóng
+    start = time.perf_counter()
+    for _ in range(repeat):
+        QPixmap.fromImage(func(pix))
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def main():
+    app = QGuiApplication(sys.argv)
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    
+    print(f"{'Kích thước':<10} {'Cũ (ms)':>10} {'Mới (ms)':>10} {'Nhanh hơn':>10}")
+    for name, (width, height) in SIZES.items():
+        pix = make_pixmap(width, height)
+        
+        # Kiểm tra hai đường cho cùng kết quả
+        assert convert_old(pix).convertToFormat(QImage.Format.Format_RGB32) == convert_new(pix)
+        
+        old_ms = bench(convert_old, pix, repeat)
+        new_ms = bench(convert_new, pix, repeat)
+        print(f"{name:<10} {old_ms:>10.2f} {new_ms:>10.2f} {old_ms / new_ms:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark bộ nhớ cấp phát mỗi frame của đường ghi dự phòng (mss)
+So sánh đường cũ (np.array + cvtColor tạo mảng mới + np.array_equal) với đường mới
+(bọc buffer mss, chép vào ô cấp phát sẵn, chuyển màu vào buffer dùng lại)
+Đo bằng tracemalloc: đỉnh bộ nhớ tạm trong mỗi frame sau khi đã làm nóng
+
+Lưu ý: mss tạo buffer mới cho mỗi lần chụp (cột "Chụp mss"), đường ghi không tránh được;
+các cột còn lại chỉ tính phần sau khi chụp. Với PyAV (VFR), VideoFrame.from_ndarray tạo
+một frame mới cho mỗi frame được encode; benchmark đổi nội dung mọi frame nên đây là
+trường hợp xấu nhất, khi slide đứng yên VFR không encode nên không cấp phát
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+import numpy as np
+import cv2
+
+from screen_recorder import FrameRing, CfrWriter, VfrWriter, store_screenshot
+
+SIZES = {
+    '1080p': (1920, 1080),
+    '4K': (3840, 2160),
+}
+FPS = 30
+WARMUP = 5
+MAX_BYTES_PER_FRAME = 64 * 1024  # Vài object Python nhỏ, không phải cả frame
+
+class FakeScreenShot:
+    """Giống mss ScreenShot: mỗi lần chụp là một buffer BGRA mới trong .raw"""
+    def __init__(self, width, height, i):
+        self.width = width
+        self.height = height
+        self.raw = bytearray(width * height * 4)
+        self.raw[i % len(self.raw)] = 1 + i % 255  # Mỗi frame khác nhau để VFR encode mọi frame
+        self.__array_interface__ = {'version': 3, 'shape': (height, width, 4),
+                                    'typestr': '|u1', 'data': self.raw}
+
+def frame_old(screenshot, ring, out, previous, i):
+    """Đường cũ: copy ảnh mss, cvtColor và array_equal đều tạo mảng cỡ frame"""
+    index = ring.acquire()
+    ring.frames[index][...] = np.array(screenshot)
+    ring.publish(index, i / FPS)
+    index = ring.take()
+    frame = ring.frames[index]
+    np.array_equal(frame, previous)
+    out.write(cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR))
+    np.copyto(previous, frame)
+    ring.release(index)
+
+def frame_new(screenshot, ring, writer, i):
+    """Đường mới: như RecordingThread._record_with_python và _encode_frames"""
+    index = ring.acquire()
+    store_screenshot(screenshot, ring.frames[index])
+    ring.publish(index, i / FPS)
+    index = ring.take()
+    writer.write(ring.frames[index], ring.timestamps[index])
+    ring.release(index)
+
+def measure(step, width, height, repeat):
+    """Trả về (byte mỗi lần chụp, đỉnh bộ nhớ tạm lớn nhất của đường ghi) sau khi làm nóng"""
+    grab_bytes = 0
+    worst = 0
+    tracemalloc.start()
+    for i in range(WARMUP + repeat):
+        before, _ = tracemalloc.get_traced_memory()
+        screenshot = FakeScreenShot(width, height, i)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        step(screenshot, i)
+        _, peak = tracemalloc.get_traced_memory()
+        if i >= WARMUP:
+            grab_bytes = max(grab_bytes, current - before)
+            worst = max(worst, peak - current)
+        del screenshot
+    tracemalloc.stop()
+    return grab_bytes, worst
+
+def open_vfr(path, width, height):
+    """VfrWriter nếu có cài PyAV, None nếu không"""
+    try:
+        return VfrWriter(path, (width, height), keepalive_interval=2.0)
+    except ImportError:
+        return None
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    
+    print(f"{'Kích thước':<10} {'Chụp mss':>12} {'Cũ':>12} {'Mới CFR':>12} {'Mới VFR':>12}   (KB/frame)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (width, height) in SIZES.items():
+            shape = (height, width, 4)
+            
+            ring = FrameRing(shape)
+            previous = np.zeros(shape, np.uint8)
+            out = cv2.VideoWriter(os.path.join(tmp, f'old_{name}.avi'),
+                                  cv2.VideoWriter_fourcc(*'mp4v'), FPS, (width, height))
+            grab_bytes, old_bytes = measure(lambda s, i: frame_old(s, ring, out, previous, i),
+                                            width, height, repeat)
+            out.release()
+            
+            ring = FrameRing(shape)
+            writer = CfrWriter(os.path.join(tmp, f'cfr_{name}.avi'), FPS, (width, height))
+            _, cfr_bytes = measure(lambda s, i: frame_new(s, ring, writer, i), width, height, repeat)
+            writer.close()
+            
+            vfr = '-'
+            writer = open_vfr(os.path.join(tmp, f'vfr_{name}.mp4'), width, height)
+            if writer is not None:
+                ring = FrameRing(shape)
+                _, vfr_bytes = measure(lambda s, i: frame_new(s, ring, writer, i), width, height, repeat)
+                writer.close()
+                vfr = f"{vfr_bytes / 1024:.1f}"
+            
+            print(f"{name:<10} {grab_bytes / 1024:>12.1f} {old_bytes / 1024:>12.1f} "
+                  f"{cfr_bytes / 1024:>12.1f} {vfr:>12}")
+            assert cfr_bytes < MAX_BYTES_PER_FRAME, f"{name}: đường CFR vẫn cấp phát {cfr_bytes} byte/frame"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kiểm tra xuất PDF kèm nét vẽ trên các trang bị xoay (0, 90, 180, 270 độ)
+Nét ngang từ (0.05, 0.05) đến (0.2, 0.05) theo tọa độ slide phải nằm ngang ở góc trên bên trái
+của trang khi hiển thị, bất kể /Rotate của trang
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import fitz  # PyMuPDF
+from PyQt6.QtCore import QPointF
+from PyQt6.QtGui import QColor
+
+from annotation_exporter import AnnotationExporter
+from stroke_history import Stroke
+
+ROTATIONS = (0, 90, 180, 270)
+TOLERANCE = 4  # Pixel, cho đầu tròn và độ dày nét
+
+def make_stroke():
+    """Nét ngang màu đỏ gần góc trên bên trái slide"""
+    stroke = Stroke(QColor('red'), 0.01)
+    stroke.add_point(QPointF(0.05, 0.05))
+    stroke.add_point(QPointF(0.2, 0.05))
+    return stroke
+
+def red_bounds(page):
+    """Vùng các pixel đỏ khi render trang (theo hướng hiển thị)"""
+    pix = page.get_pixmap(alpha=False)
+    pixels = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, 3)
+    ys, xs = np.where((pixels[:, :, 0] > 200) & (pixels[:, :, 1] < 80) & (pixels[:, :, 2] < 80))
+    return pix.width, (xs.min(), ys.min(), xs.max(), ys.max())
+
+def check(rotation, folder):
+    """Xuất một trang 600x400 xoay rotation độ, trả về (vùng nét, vùng mong đợi)"""
+    source = os.path.join(folder, f'rot_{rotation}.pdf')
+    output = os.path.join(folder, f'rot_{rotation}_out.pdf')
+    doc = fitz.open()
+    doc.new_page(width=600, height=400).set_rotation(rotation)
+    doc.save(source)
+    doc.close()
+    
+    exporter = AnnotationExporter(source, output, {0: [make_stroke()]})
+    exporter.run()  # Chạy trực tiếp trên thread hiện tại
+    
+    doc = fitz.open(output)
+    width, bounds = red_bounds(doc[0])
+    doc.close()
+    expected = (0.05 * width, 0.05 * width, 0.2 * width, 0.05 * width)
+    return bounds, expected
+
+def main():
+    failed = False
+    with tempfile.TemporaryDirectory() as folder:
+        for rotation in ROTATIONS:
+            bounds, expected = check(rotation, folder)
+            # Các cạnh của nét (cộng nửa độ dày) phải khớp vị trí mong đợi
+            ok = all(abs(b - e) <= TOLERANCE for b, e in zip(bounds, expected))
+            failed = failed or not ok
+            print(f"Xoay {rotation:>3}: nét {tuple(int(v) for v in bounds)}, "
+                  f"mong đợi {tuple(round(v) for v in expected)} {'OK' if ok else 'SAI'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
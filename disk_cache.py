@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import hashlib
+import struct
+import threading
+import shutil
+from PyQt6.QtGui import QImage
+
+# Header của file cache: magic, width, height, bytes per line, định dạng QImage
+_HEADER = struct.Struct('<4sIIII')
+_MAGIC = b'DPR1'
+
+def get_cache_root():
+    """Thư mục cache của ứng dụng (theo XDG_CACHE_HOME, mặc định ~/.cache)"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'draft-presentation')
+
+def file_fingerprint(file_path):
+    """Dấu vân tay của file theo đường dẫn, mtime và kích thước"""
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+class DiskRenderCache:
+    """Cache ảnh trang đã render trên đĩa, dùng lại giữa các lần mở file"""
+    def __init__(self, cache_dir=None, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = cache_dir or os.path.join(get_cache_root(), 'renders')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Tính khi cần lần đầu
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        
+    def open_document(self, file_path):
+        """Lấy key cache cho file, xóa các entry của phiên bản cũ của cùng file"""
+        path_key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:20]
+        fingerprint = file_fingerprint(file_path)
+        document_dir = os.path.join(self.cache_dir, path_key)
+        
+        # File đã bị sửa: các thư mục fingerprint khác không còn hợp lệ
+        if os.path.isdir(document_dir):
+            for entry in os.scandir(document_dir):
+                if entry.name != fingerprint and entry.is_dir():
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    with self._lock:
+                        self._total_bytes = None
+        
+        return os.path.join(path_key, fingerprint)
+        
+    def _entry_path(self, document_key, page_num, scale):
+        return os.path.join(self.cache_dir, document_key, f"{page_num}_{scale:.4f}.img")
+        
+    def contains(self, document_key, page_num, scale):
+        """Kiểm tra trang đã có trong cache đĩa chưa"""
+        return os.path.exists(self._entry_path(document_key, page_num, scale))
+        
+    def get(self, document_key, page_num, scale):
+        """Đọc ảnh trang từ cache đĩa, trả về None nếu chưa có"""
+        path = self._entry_path(document_key, page_num, scale)
+        try:
+            with open(path, 'rb') as f:
+                magic, width, height, bytes_per_line, image_format = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return None
+                
+                # Đọc thẳng vào bộ nhớ của QImage, không qua buffer trung gian
+                image = QImage(width, height, QImage.Format(image_format))
+                if image.bytesPerLine() != bytes_per_line:
+                    return None
+                bits = image.bits()
+                bits.setsize(image.sizeInBytes())
+                if f.readinto(memoryview(bits)) != image.sizeInBytes():
+                    return None
+            
+            # Cập nhật mtime để eviction theo thứ tự dùng gần nhất
+            os.utime(path)
+            return image
+        except (OSError, ValueError, struct.error):
+            return None
+            
+    def put(self, document_key, page_num, scale, image):
+        """Ghi ảnh trang vào cache đĩa"""
+        if self.max_bytes <= 0 or image is None or image.isNull():
+            return
+        
+        path = self._entry_path(document_key, page_num, scale)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            bits = image.constBits()
+            bits.setsize(image.sizeInBytes())
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, image.width(), image.height(),
+                                     image.bytesPerLine(), image.format().value))
+                f.write(memoryview(bits))
+            
+            # Ghi file tạm rồi đổi tên để không bao giờ đọc phải file ghi dở
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += _HEADER.size + image.sizeInBytes()
+        self._evict_if_needed()
+        
+    def _scan(self):
+        """Liệt kê các entry (mtime, kích thước, đường dẫn)"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+        
+    def _evict_if_needed(self):
+        """Xóa các entry dùng lâu nhất khi cache vượt dung lượng"""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            if self._total_bytes <= self.max_bytes:
+                return
+            
+            # Xóa xuống 90% dung lượng để không phải quét lại ở mỗi lần ghi
+            entries = sorted(self._scan())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total_bytes = total
@@ -2,14 +2,40 @@
 # -*- coding: utf-8 -*-
 
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QSlider, QColorDialog
-from PyQt6.QtCore import Qt, QPoint, QRect
-from PyQt6.QtGui import QPainter, QPen, QColor, QPixmap, QFont, QKeySequence, QShortcut
+from PyQt6.QtCore import Qt, QPoint, QPointF, QRectF
+from PyQt6.QtGui import QPainter, QPen, QColor, QPixmap, QFont, QKeySequence, QShortcut, QTransform
 
+from stroke_history import Stroke
+from annotation_layers import AnnotationLayers
+
+class DrawingArea(QWidget):
+    """Khu vực vẽ: blit lớp nét vẽ theo pan offset, chỉ vẽ lại vùng bị thay đổi"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.layer = None  # QPixmap chứa các nét vẽ (tọa độ nội dung, chưa tính pan)
+        self.pan_offset = QPoint(0, 0)
+        self.preview = None  # QTransform phóng tạm lớp nét vẽ trong lúc chờ zoom ổn định
+        
+    def paintEvent(self, event):
+        """Chỉ copy phần lớp nét vẽ nằm trong vùng cần vẽ lại"""
+        if self.layer is None:
+            return
+        painter = QPainter(self)
+        if self.preview is not None:
+            # Xem trước zoom: scale nhanh ảnh đang có (không làm mượt)
+            painter.translate(QPointF(self.pan_offset))
+            painter.setTransform(self.preview, True)
+            painter.drawPixmap(0, 0, self.layer)
+        else:
+            dirty = event.rect()
+            painter.drawPixmap(dirty, self.layer, dirty.translated(-self.pan_offset))
+        painter.end()
+        
 class DrawingOverlay(QWidget):
     def __init__(self, target_widget, pan_offset=QPoint(0, 0)):
         super().__init__()
         self.target_widget = target_widget
-        self.pan_offset = pan_offset
+        self.pan_offset = QPoint(pan_offset)
         
         # Thiết lập overlay
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.Tool)
@@ -18,15 +44,12 @@ class DrawingOverlay(QWidget):
         
         # Biến vẽ
         self.drawing = False
-        self.last_point = QPoint()
         self.pen_color = QColor(255, 0, 0)  # Màu đỏ mặc định
         self.pen_width = 3
-        self.drawing_history = []
-        self.current_drawing = []
+        self.current_drawing = None  # Stroke đang vẽ
         
-        # Tạo canvas vẽ
-        self.canvas = QPixmap(target_widget.size())
-        self.canvas.fill(Qt.GlobalColor.transparent)
+        # Vị trí slide trong target widget (chưa tính pan); nét lưu theo tọa độ chuẩn hóa của slide
+        self.slide_rect = QRectF(QPointF(0, 0), target_widget.size().toSizeF())
         
         # Thiết lập giao diện
         self.init_ui()
@@ -35,10 +58,73 @@ class DrawingOverlay(QWidget):
         # Cập nhật vị trí và kích thước
         self.update_position()
         
+    def set_slide(self, slide):
+        """Chuyển sang lớp nét vẽ của slide khác (đổi canvas, không vẽ lại nét)"""
+        if slide == self.slide:
+            return
+        if self.drawing:
+            self._finish_stroke()
+        
+        self.layer.canvas = self.canvas
+        self.slide = slide
+        self._activate_layer()
+        
+    def clear_all_slides(self):
+        """Xóa nét vẽ của tất cả slide (ví dụ khi mở file khác)"""
+        self.drawing = False
+        self.current_drawing = None
+        self.layers.clear()
+        self._activate_layer()
+        
+    def set_slide_rect(self, slide_rect):
+        """Cập nhật vị trí slide sau khi zoom/đổi kích thước: vẽ lại nét từ path đã cache theo transform mới"""
+        self.drawing_area.preview = None
+        if slide_rect == self.slide_rect:
+            self.drawing_area.update()
+            return
+        if self.drawing:
+            self._finish_stroke()
+        
+        self.layer.canvas = self.canvas
+        self.slide_rect = QRectF(slide_rect)
+        self._activate_layer()
+        
+    def preview_slide_rect(self, slide_rect):
+        """Trong lúc zoom: chỉ scale ảnh nét vẽ hiện có theo vị trí slide mới"""
+        old_transform, _ = self.view_transform().inverted()
+        self.drawing_area.preview = old_transform * self.view_transform(slide_rect)
+        self.drawing_area.update()
+        
+    def view_transform(self, slide_rect=None):
+        """Transform từ tọa độ chuẩn hóa của slide sang pixel canvas (chưa tính pan)"""
+        rect = slide_rect or self.slide_rect
+        # Canvas nằm dưới thanh công cụ, target widget bắt đầu từ góc overlay
+        transform = QTransform()
+        transform.translate(rect.x(), rect.y() - self.toolbar.height())
+        transform.scale(rect.width(), rect.width())
+        return transform
+        
+    def _activate_layer(self):
+        """Hiển thị lớp của slide hiện tại, có ảnh đúng kích thước và transform"""
+        self._show_layer(self.layers.activate(self.slide, self.target_widget.size(),
+                                              self.view_transform()))
+        
+    def _show_layer(self, layer):
+        """Hiển thị lớp nét vẽ của slide hiện tại"""
+        self.layer = layer
+        self.history = layer.history
+        self.canvas = layer.canvas
+        self.drawing_area.layer = self.canvas
+        self.drawing_area.update()
+        self.update_history_buttons()
+        
     def set_pan_offset(self, pan_offset):
-        """Cập nhật pan offset"""
-        self.pan_offset = pan_offset
-        self.update_canvas()
+        """Cập nhật pan offset (chỉ dịch vị trí blit, không vẽ lại nét)"""
+        if pan_offset == self.pan_offset:
+            return
+        self.pan_offset = QPoint(pan_offset)
+        self.drawing_area.pan_offset = self.pan_offset
+        self.drawing_area.update()
         
     def init_ui(self):
         # Layout chính
@@ -51,13 +137,15 @@ class DrawingOverlay(QWidget):
         layout.addWidget(self.toolbar)
         
         # Khu vực vẽ (chiếm toàn bộ không gian còn lại)
-        self.drawing_area = QLabel()
-        self.drawing_area.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.drawing_area = DrawingArea()
+        self.drawing_area.pan_offset = self.pan_offset
         self.drawing_area.setMinimumSize(1, 1)  # Đảm bảo có kích thước tối thiểu
         layout.addWidget(self.drawing_area)
         
-        # Cập nhật canvas
-        self.update_canvas()
+        # Mỗi slide có lớp nét vẽ riêng (lịch sử hoàn tác/làm lại và canvas)
+        self.layers = AnnotationLayers()
+        self.slide = 0
+        self._activate_layer()
         
     def create_toolbar(self):
         toolbar = QWidget()
@@ -107,6 +195,23 @@ class DrawingOverlay(QWidget):
             }
         """)
         
+        # Nút làm lại
+        self.redo_btn = QPushButton("Làm lại")
+        self.redo_btn.clicked.connect(self.redo_last_drawing)
+        self.redo_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #6c757d;
+                color: white;
+                border: none;
+                padding: 5px 10px;
+                border-radius: 3px;
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                background-color: #545b62;
+            }
+        """)
+        
         # Nút thay đổi màu
         self.color_btn = QPushButton("Màu")
         self.color_btn.clicked.connect(self.change_color)
@@ -151,6 +256,7 @@ class DrawingOverlay(QWidget):
         
         layout.addWidget(self.clear_btn)
         layout.addWidget(self.undo_btn)
+        layout.addWidget(self.redo_btn)
         layout.addWidget(self.color_btn)
         layout.addWidget(width_label)
         layout.addWidget(self.width_slider)
@@ -166,6 +272,9 @@ class DrawingOverlay(QWidget):
         self.shortcut_undo = QShortcut(QKeySequence("Ctrl+Z"), self)
         self.shortcut_undo.activated.connect(self.undo_last_drawing)
         
+        self.shortcut_redo = QShortcut(QKeySequence("Ctrl+Y"), self)
+        self.shortcut_redo.activated.connect(self.redo_last_drawing)
+        
         self.shortcut_color = QShortcut(QKeySequence("C"), self)
         self.shortcut_color.activated.connect(self.change_color)
         
@@ -177,102 +286,126 @@ class DrawingOverlay(QWidget):
             self.setGeometry(pos.x(), pos.y(), size.width(), size.height())
             
     def update_canvas(self):
-        """Cập nhật canvas vẽ"""
+        """Vẽ lại toàn bộ canvas từ lịch sử"""
         if self.target_widget:
             # Tạo canvas với kích thước của target widget (không bao gồm toolbar)
             target_size = self.target_widget.size()
-            self.canvas = QPixmap(target_size)
-            self.canvas.fill(Qt.GlobalColor.transparent)
             
-            # Vẽ lại tất cả các nét vẽ
-            painter = QPainter(self.canvas)
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            
-            for drawing_path in self.drawing_history:
-                pen = QPen(drawing_path['color'], drawing_path['width'])
-                painter.setPen(pen)
-                
-                points = drawing_path['points']
-                if len(points) > 1:
-                    for i in range(1, len(points)):
-                        painter.drawLine(points[i-1], points[i])
-                        
-            painter.end()
+            # Vẽ lại từ checkpoint gần nhất thay vì từ nét đầu tiên
+            self.canvas = self.history.rebuild(target_size, self.view_transform())
             
             # Hiển thị canvas
-            self.drawing_area.setPixmap(self.canvas)
+            self.drawing_area.layer = self.canvas
+            self.drawing_area.update()
             
+    def resize_canvas(self):
+        """Đổi kích thước canvas theo target widget, giữ nguyên nét đã vẽ (không vẽ lại)"""
+        if not self.target_widget or self.canvas.size() == self.target_widget.size():
+            return
+        canvas = QPixmap(self.target_widget.size())
+        canvas.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(canvas)
+        painter.drawPixmap(0, 0, self.canvas)
+        painter.end()
+        self.canvas = canvas
+        self.drawing_area.layer = self.canvas
+        self.drawing_area.update()
+        
+    def _slide_point(self, pos):
+        """Đổi vị trí chuột sang tọa độ chuẩn hóa của slide; None nếu nằm ngoài khu vực vẽ"""
+        area_pos = self.drawing_area.mapFrom(self, pos)
+        if not self.drawing_area.rect().contains(area_pos):
+            return None
+        
+        # Bỏ pan offset rồi đổi ngược từ pixel canvas
+        inverse, _ = self.view_transform().inverted()
+        return inverse.map(QPointF(area_pos - self.pan_offset))
+        
     def mousePressEvent(self, event):
         """Xử lý sự kiện nhấn chuột"""
         if event.button() == Qt.MouseButton.LeftButton:
-            self.drawing = True
-            # Tính toán vị trí tương đối với khu vực vẽ (không bao gồm toolbar)
-            pos = event.pos()
-            toolbar_height = self.toolbar.height()
-            relative_pos = QPoint(pos.x(), pos.y() - toolbar_height)
-            
-            # Điều chỉnh vị trí theo pan offset
-            adjusted_pos = relative_pos - self.pan_offset
-            
-            # Đảm bảo vị trí nằm trong khu vực vẽ
-            if adjusted_pos.y() >= 0:
-                self.last_point = adjusted_pos
-                self.current_drawing = [adjusted_pos]
+            # Đảm bảo vị trí nằm trong khu vực vẽ (không bao gồm toolbar)
+            point = self._slide_point(event.pos())
+            if point is not None:
+                # Độ dày và khoảng cách bỏ điểm (2 pixel) đổi sang đơn vị chuẩn hóa
+                scale = self.slide_rect.width()
+                self.drawing = True
+                self.current_drawing = Stroke(self.pen_color, self.pen_width / scale, 2.0 / scale)
+                self.current_drawing.add_point(point)
             
     def mouseMoveEvent(self, event):
         """Xử lý sự kiện di chuyển chuột"""
         if self.drawing:
-            # Tính toán vị trí tương đối với khu vực vẽ (không bao gồm toolbar)
-            pos = event.pos()
-            toolbar_height = self.toolbar.height()
-            relative_pos = QPoint(pos.x(), pos.y() - toolbar_height)
-            
-            # Điều chỉnh vị trí theo pan offset
-            current_point = relative_pos - self.pan_offset
-            
             # Chỉ vẽ nếu vị trí nằm trong khu vực vẽ
-            if current_point.y() >= 0 and self.last_point.y() >= 0:
-                # Vẽ lên canvas
-                painter = QPainter(self.canvas)
-                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            current_point = self._slide_point(event.pos())
+            if current_point is not None:
+                self._extend_stroke(current_point)
                 
-                pen = QPen(self.pen_color, self.pen_width)
-                painter.setPen(pen)
-                painter.drawLine(self.last_point, current_point)
-                painter.end()
-                
-                # Lưu điểm để vẽ
-                self.current_drawing.append(current_point)
-                
-                # Cập nhật hiển thị
-                self.drawing_area.setPixmap(self.canvas)
-                
-                self.last_point = current_point
-            
+    def _extend_stroke(self, point, force=False):
+        """Thêm điểm vào nét đang vẽ và chỉ vẽ đoạn mới lên canvas"""
+        last_point = self.current_drawing.last_point()
+        if not self.current_drawing.add_point(point, force):
+            return  # Điểm quá gần điểm trước, bỏ qua
+        point = self.current_drawing.last_point()
+        
+        # Chỉ vẽ đoạn mới lên canvas, không vẽ lại các nét cũ
+        transform = self.view_transform()
+        painter = QPainter(self.canvas)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setTransform(transform)
+        painter.setPen(self.current_drawing.pen())
+        painter.drawLine(last_point, point)
+        painter.end()
+        
+        # Chỉ cập nhật vùng bao quanh đoạn vừa vẽ
+        margin = self.pen_width // 2 + 2
+        dirty = transform.mapRect(QRectF(last_point, point).normalized()).toAlignedRect()
+        self.drawing_area.update(dirty.adjusted(-margin, -margin, margin, margin)
+                                 .translated(self.pan_offset))
+        
     def mouseReleaseEvent(self, event):
         """Xử lý sự kiện thả chuột"""
         if event.button() == Qt.MouseButton.LeftButton and self.drawing:
-            self.drawing = False
+            # Luôn giữ điểm cuối của nét
+            point = self._slide_point(event.pos())
+            if point is not None:
+                self._extend_stroke(point, force=True)
+            self._finish_stroke()
             
-            # Lưu nét vẽ vào lịch sử
-            if len(self.current_drawing) > 1:
-                self.drawing_history.append({
-                    'points': self.current_drawing.copy(),
-                    'color': QColor(self.pen_color),
-                    'width': self.pen_width
-                })
+    def _finish_stroke(self):
+        """Kết thúc nét đang vẽ và lưu vào lịch sử của slide hiện tại"""
+        self.drawing = False
+        if len(self.current_drawing) > 1:
+            self.history.push(self.current_drawing, self.canvas)
+            self.update_history_buttons()
+        self.current_drawing = None
                 
     def clear_drawing(self):
-        """Xóa toàn bộ nét vẽ"""
-        self.drawing_history.clear()
+        """Xóa toàn bộ nét vẽ của slide hiện tại"""
+        self.history.clear()
         self.canvas.fill(Qt.GlobalColor.transparent)
-        self.drawing_area.setPixmap(self.canvas)
+        self.drawing_area.update()
+        self.update_history_buttons()
         
     def undo_last_drawing(self):
         """Hoàn tác nét vẽ cuối cùng"""
-        if self.drawing_history:
-            self.drawing_history.pop()
-            self.update_canvas()
+        if self.history.can_undo():
+            self.canvas = self.history.undo(self.canvas)
+            self.drawing_area.layer = self.canvas
+            self.drawing_area.update()
+            self.update_history_buttons()
+            
+    def redo_last_drawing(self):
+        """Làm lại nét vẽ vừa hoàn tác"""
+        if self.history.can_redo():
+            self.history.redo(self.canvas)
+            self.drawing_area.update()
+            self.update_history_buttons()
+            
+    def update_history_buttons(self):
+        """Bật/tắt nút hoàn tác và làm lại theo lịch sử"""
+        self.undo_btn.setEnabled(self.history.can_undo())
+        self.redo_btn.setEnabled(self.history.can_redo())
             
     def change_color(self):
         """Thay đổi màu vẽ"""
@@ -287,17 +420,34 @@ class DrawingOverlay(QWidget):
     def resizeEvent(self, event):
         """Xử lý sự kiện thay đổi kích thước"""
         super().resizeEvent(event)
-        self.update_canvas()
+        self.resize_canvas()
         
     def showEvent(self, event):
         """Xử lý sự kiện hiển thị"""
         super().showEvent(event)
         self.update_position()
         
+    def paint_annotations(self, painter):
+        """Vẽ các nét đang hiển thị lên painter theo tọa độ overlay (trùng với target widget)"""
+        area = self.drawing_area
+        painter.save()
+        painter.setClipRect(area.geometry())
+        painter.translate(QPointF(area.pos() + self.pan_offset))
+        if area.preview is not None:
+            painter.setTransform(area.preview, True)
+        painter.drawPixmap(0, 0, self.canvas)
+        painter.restore()
+        
     def get_drawing_image(self):
         """Lấy ảnh của nét vẽ (để lưu hoặc xuất)"""
         return self.canvas
         
+    def get_annotations(self):
+        """Nét vẽ của tất cả slide: {slide: [Stroke]} theo tọa độ chuẩn hóa của slide"""
+        if self.drawing:
+            self._finish_stroke()
+        return self.layers.annotations()
+        
     def save_drawing(self, file_path):
         """Lưu nét vẽ thành file ảnh"""
         try:
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import subprocess
+import tempfile
+from fractions import Fraction
+import numpy as np
+from PyQt6.QtCore import Qt, QObject, QSize, QTimer, QEvent, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter
+
+class PipeEncoder:
+    """Encode qua ffmpeg (rawvideo BGRA trên stdin); timestamp là thời điểm ffmpeg nhận frame"""
+    def __init__(self, output_file, width, height):
+        self.width = width
+        self.height = height
+        # Log ra file tạm thay vì pipe: không ai đọc stderr khi đang ghi nên pipe có thể đầy và chặn ffmpeg
+        self.log = tempfile.TemporaryFile()
+        try:
+            self.process = subprocess.Popen(self._command(output_file), stdin=subprocess.PIPE,
+                                            stdout=subprocess.DEVNULL, stderr=self.log)
+        except BaseException:
+            self.log.close()
+            raise
+        
+    def _command(self, output_file):
+        return [
+            'ffmpeg', '-loglevel', 'error', '-nostats',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgra',  # QImage.Format_RGB32 trên máy little-endian
+            '-video_size', f'{self.width}x{self.height}',
+            '-use_wallclock_as_timestamps', '1',
+            '-i', '-',
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',
+            '-crf', str(23),
+            '-pix_fmt', 'yuv420p',
+            '-vsync', 'vfr',  # Không nhân bản frame, giữ timestamp gốc
+            '-y', output_file
+        ]
+        
+    def write(self, data, pts):
+        """Ghi một frame (pts bị bỏ qua, ffmpeg tự gán theo thời điểm nhận)"""
+        self.process.stdin.write(data)
+        
+    def close(self):
+        """Đóng stdin để ffmpeg kết thúc file rồi chờ"""
+        try:
+            self.process.communicate()
+            if self.process.returncode != 0:
+                raise Exception(f"ffmpeg lỗi khi ghi frame: {self._log_tail() or self.process.returncode}")
+        finally:
+            self.log.close()
+            
+    def _log_tail(self, size=500):
+        """Phần cuối log của ffmpeg để báo lỗi"""
+        self.log.seek(0)
+        return self.log.read()[-size:].decode('utf-8', 'replace').strip()
+            
+class PyAVEncoder:
+    """Encode bằng PyAV (nếu có cài): mỗi frame mang đúng PTS lúc chụp"""
+    def __init__(self, output_file, width, height):
+        import av
+        self.av = av
+        self.width = width
+        self.height = height
+        self.container = av.open(output_file, 'w')
+        self.stream = self.container.add_stream('libx264', options={'preset': 'ultrafast', 'crf': '23'})
+        self.stream.width = width
+        self.stream.height = height
+        self.stream.pix_fmt = 'yuv420p'
+        self.stream.codec_context.time_base = Fraction(1, 1000)  # PTS theo mili giây
+        self.last_pts = -1
+        
+    def write(self, data, pts):
+        """Ghi một frame BGRA (bytes hoặc numpy array) tại thời điểm pts (giây)"""
+        if not isinstance(data, np.ndarray):
+            data = np.frombuffer(data, np.uint8).reshape(self.height, self.width, 4)
+        frame = self.av.VideoFrame.from_ndarray(data, format='bgra')
+        self.last_pts = max(round(pts * 1000), self.last_pts + 1)  # PTS phải tăng dần
+        frame.pts = self.last_pts
+        frame.time_base = Fraction(1, 1000)
+        for packet in self.stream.encode(frame):
+            self.container.mux(packet)
+            
+    def close(self):
+        """Đẩy các frame còn trong encoder rồi đóng file"""
+        for packet in self.stream.encode(None):
+            self.container.mux(packet)
+        self.container.close()
+        
+def open_encoder(output_file, width, height):
+    """Encoder VFR: PyAV nếu có (PTS chính xác), không thì pipe vào ffmpeg"""
+    try:
+        return PyAVEncoder(output_file, width, height)
+    except ImportError:
+        return PipeEncoder(output_file, width, height)
+        
+class FrameRecorder(QObject):
+    """Ghi trực tiếp các frame đang hiển thị vào ffmpeg (rawvideo qua stdin), không chụp màn hình X11"""
+    # Chỉ gửi frame khi nội dung thay đổi (đổi slide, nét vẽ, pan, zoom), mỗi frame có PTS
+    # nên frame tĩnh được kéo dài bằng timestamp thay vì encode lại nhiều lần
+    recording_started = pyqtSignal()
+    recording_stopped = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+    
+    def __init__(self, output_file, grab_frame, fps=30, keepalive_interval=2.0, parent=None):
+        super().__init__(parent)
+        self.output_file = output_file
+        self.grab_frame = grab_frame  # Hàm trả về QImage của frame đang hiển thị
+        self.fps = fps  # Số lần kiểm tra thay đổi tối đa mỗi giây
+        self.keepalive_interval = keepalive_interval  # Ghi lại frame cuối sau mỗi N giây không đổi
+        
+        self.size = None  # Kích thước video, cố định theo frame đầu tiên
+        self.encoder = None
+        self.dirty = True  # Nội dung đã thay đổi từ frame trước
+        self.frames_sent = 0  # Số frame thực sự gửi cho encoder
+        self.keepalive_frames = 0  # Trong đó số frame giữ nhịp (không có thay đổi)
+        self._grabbing = False
+        self._last_frame = None
+        self._start_time = None
+        self._last_sent = 0.0
+        
+        # Frame chờ ghi: chỉ giữ frame mới nhất, thread ghi không làm chậm GUI
+        self._pending = None
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._writer = None
+        
+        self.timer = QTimer(self)
+        self.timer.setInterval(max(1, 1000 // fps))
+        self.timer.timeout.connect(self._tick)
+        
+    def watch(self, widget):
+        """Đánh dấu có thay đổi mỗi khi widget được vẽ lại"""
+        widget.installEventFilter(self)
+        
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and not self._grabbing:
+            self.dirty = True
+        return super().eventFilter(obj, event)
+        
+    def mark_damaged(self):
+        """Báo nội dung đã thay đổi mà không qua việc vẽ lại widget (ví dụ ẩn overlay)"""
+        self.dirty = True
+        
+    def isRunning(self):
+        return self.encoder is not None
+        
+    def start(self):
+        """Lấy frame đầu tiên để biết kích thước rồi mở encoder"""
+        try:
+            self._start_time = time.monotonic()
+            image = self._grab()
+            # libx264 với yuv420p cần kích thước chẵn (như even_region khi ghi x11grab)
+            self.size = QSize(max(2, image.width() & ~1), max(2, image.height() & ~1))
+            self.encoder = open_encoder(self.output_file, self.size.width(), self.size.height())
+        except FileNotFoundError:
+            self.error_occurred.emit("Cần cài đặt ffmpeg để ghi frame trình chiếu")
+            return
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+            return
+        
+        self._stopping = False
+        self._writer = threading.Thread(target=self._write_frames, name="frame-writer", daemon=True)
+        self._writer.start()
+        self._push(self._fit(image))
+        self.timer.start()
+        self.recording_started.emit()
+        
+    def _tick(self):
+        """Chỉ chụp và gửi frame khi nội dung đã thay đổi, hoặc frame giữ nhịp khi đứng yên lâu"""
+        if self.dirty:
+            self._push(self._fit(self._grab()))
+        elif time.monotonic() - self._last_sent >= self.keepalive_interval:
+            self.keepalive_frames += 1
+            self._send(self._last_frame)
+            
+    def _grab(self):
+        """Chụp frame hiện tại (không tự đánh dấu thay đổi khi widget vẽ vào ảnh)"""
+        self._grabbing = True
+        try:
+            image = self.grab_frame()
+        finally:
+            self._grabbing = False
+        self.dirty = False
+        return image
+        
+    def _fit(self, image):
+        """Đưa frame về kích thước video (scale giữ tỷ lệ, thêm viền đen)"""
+        image = image.convertToFormat(QImage.Format.Format_RGB32)
+        if image.size() == self.size:
+            return image
+        if 0 <= image.width() - self.size.width() <= 1 and 0 <= image.height() - self.size.height() <= 1:
+            # Chỉ thừa một pixel do làm tròn về kích thước chẵn: cắt bỏ cạnh thay vì scale cả frame
+            return image.copy(0, 0, self.size.width(), self.size.height())
+        frame = QImage(self.size, QImage.Format.Format_RGB32)
+        frame.fill(Qt.GlobalColor.black)
+        scaled = image.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio,
+                              Qt.TransformationMode.SmoothTransformation)
+        painter = QPainter(frame)
+        painter.drawImage((self.size.width() - scaled.width()) // 2,
+                          (self.size.height() - scaled.height()) // 2, scaled)
+        painter.end()
+        return frame
+        
+    def _push(self, frame):
+        """Copy frame đã đúng kích thước và gửi cho thread ghi"""
+        bits = frame.constBits()
+        bits.setsize(frame.sizeInBytes())
+        self._last_frame = bytes(bits)
+        self._send(self._last_frame)
+        
+    def _send(self, data):
+        """Chuyển frame kèm PTS (thời điểm chụp) cho thread ghi, thay frame chưa kịp ghi"""
+        self._last_sent = time.monotonic()
+        with self._cond:
+            self._pending = (data, self._last_sent - self._start_time)
+            self._cond.notify()
+            
+    def _write_frames(self):
+        """Thread đưa frame vào encoder"""
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopping:
+                    self._cond.wait()
+                pending, self._pending = self._pending, None
+                if pending is None:
+                    return
+            try:
+                self.encoder.write(*pending)
+                self.frames_sent += 1
+            except Exception as e:
+                # Encoder lỗi: lý do được báo khi đóng encoder
+                print(f"Lỗi khi ghi frame: {e}")
+                return
+            
+    def stop_recording(self):
+        """Dừng ghi: gửi lại frame cuối để video kéo dài đến lúc dừng, rồi đóng encoder"""
+        if self.encoder is None:
+            return
+        self.timer.stop()
+        if self._last_frame is not None:
+            self._send(self._last_frame)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._writer.join()
+        
+        encoder, self.encoder = self.encoder, None
+        try:
+            encoder.close()
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+        self.recording_stopped.emit()
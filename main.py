@@ -3,21 +3,28 @@
 
 import sys
 import os
+import argparse
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QLabel, QFileDialog, 
-                             QMessageBox, QSlider, QFrame, QSplitter, QScrollArea)
+                             QMessageBox, QSlider, QFrame, QSplitter, QScrollArea,
+                             QProgressBar)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QThread, QSize, QPoint
-from PyQt6.QtGui import QPixmap, QPainter, QPen, QColor, QFont, QKeySequence, QShortcut, QWheelEvent, QMouseEvent
+from PyQt6.QtGui import QImage, QPixmap, QPainter, QPen, QColor, QFont, QKeySequence, QShortcut, QWheelEvent, QMouseEvent
 from PyQt6.QtMultimedia import QMediaPlayer
 from PyQt6.QtMultimediaWidgets import QVideoWidget
 
-from presentation_viewer import PresentationViewer
+from presentation_loader import PresentationLoader
+from annotation_exporter import AnnotationExporter
+from disk_cache import DiskRenderCache
+from office_converter import OfficeConverter
+from slide_canvas import SlideCanvas
 from script_window import ScriptWindow
 from drawing_overlay import DrawingOverlay
 from screen_recorder import ScreenRecorder
 
 class PresentationApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, cache_mb=512, eager=False, render_workers=None, disk_cache_mb=1024,
+                 record_mode='auto'):
         super().__init__()
         self.setWindowTitle("Ứng dụng Trình chiếu")
         self.setGeometry(100, 100, 1200, 800)
@@ -28,12 +35,45 @@ class PresentationApp(QMainWindow):
         self.drawing_overlay = None
         self.screen_recorder = None
         self.current_file = None
+        self.loader = None  # Thread đang tải file (nếu có)
+        self.exporter = None  # Thread đang xuất PDF kèm nét vẽ (nếu có)
+        self.cache_mb = cache_mb  # Dung lượng cache slide (MB)
+        self.eager = eager  # Render trước toàn bộ PDF khi mở file
+        self.render_workers = render_workers  # Số process render song song
+        self.record_mode = record_mode  # 'screen': chụp X11, 'frames': ghi frame trong ứng dụng
+        
+        # Cache ảnh đã render trên đĩa, dùng lại khi mở lại cùng file
+        self.disk_cache = None
+        if disk_cache_mb > 0:
+            try:
+                self.disk_cache = DiskRenderCache(max_bytes=disk_cache_mb * 1024 * 1024)
+            except OSError as e:
+                print(f"Không thể tạo cache trên đĩa: {e}")
+        
+        # Chuyển PowerPoint sang PDF bằng LibreOffice (nếu có) để dùng đường render PDF
+        self.converter = OfficeConverter()
         
         # Biến cho tính năng pan
         self.panning = False
         self.last_pan_pos = QPoint()
         self.pan_offset = QPoint(0, 0)
         
+        # Gộp các yêu cầu cập nhật hiển thị: render tối đa một lần mỗi khung hình
+        self.display_dirty = False
+        self.display_timer = QTimer(self)
+        self.display_timer.setSingleShot(True)
+        self.display_timer.setInterval(16)  # ~60 FPS
+        self.display_timer.timeout.connect(self.flush_display_update)
+        self.display_actions = 0  # Số thao tác yêu cầu cập nhật hiển thị
+        self.display_renders = 0  # Số lần thực sự cập nhật hiển thị
+        self.displayed_zoom = 1.0  # Zoom của ảnh slide đang hiển thị
+        
+        # Zoom liên tục: hiển thị bản phóng to nhanh, chỉ render nét khi ngừng zoom
+        self.zoom_settle_timer = QTimer(self)
+        self.zoom_settle_timer.setSingleShot(True)
+        self.zoom_settle_timer.setInterval(150)
+        self.zoom_settle_timer.timeout.connect(self.zoom_settled)
+        
         self.init_ui()
         self.setup_shortcuts()
         
@@ -60,8 +100,8 @@ class PresentationApp(QMainWindow):
         self.presentation_container = QWidget()
         self.presentation_container.setMinimumSize(1, 1)
         
-        # Khu vực trình chiếu
-        self.presentation_area = QLabel("Chọn file để trình chiếu")
+        # Khu vực trình chiếu (giữ slide đã render, pan chỉ dịch vị trí khi vẽ)
+        self.presentation_area = SlideCanvas("Chọn file để trình chiếu")
         self.presentation_area.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.presentation_area.setStyleSheet("""
             QLabel {
@@ -161,6 +201,23 @@ class PresentationApp(QMainWindow):
             }
         """)
         
+        # Nút xuất PDF kèm nét vẽ
+        self.export_btn = QPushButton("Xuất PDF")
+        self.export_btn.clicked.connect(self.export_annotations)
+        self.export_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #009688;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 4px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #00796B;
+            }
+        """)
+        
         # Nút reset zoom
         self.reset_zoom_btn = QPushButton("Reset Zoom")
         self.reset_zoom_btn.clicked.connect(self.reset_zoom)
@@ -199,6 +256,7 @@ class PresentationApp(QMainWindow):
         layout.addWidget(self.script_btn)
         layout.addWidget(self.draw_btn)
         layout.addWidget(self.record_btn)
+        layout.addWidget(self.export_btn)
         layout.addWidget(self.reset_zoom_btn)
         layout.addWidget(self.reset_pan_btn)
         layout.addStretch()
@@ -235,6 +293,28 @@ class PresentationApp(QMainWindow):
         self.zoom_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.zoom_label.setStyleSheet("color: #666; font-size: 12px;")
         
+        # Tiến độ tải file và nút hủy
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(150)
+        self.load_progress.setFormat("Tải %p%")
+        self.load_progress.hide()
+        
+        self.cancel_load_btn = QPushButton("Hủy tải")
+        self.cancel_load_btn.clicked.connect(self.cancel_loading)
+        self.cancel_load_btn.hide()
+        
+        # Tiến độ render trước (chế độ eager)
+        self.prerender_progress = QProgressBar()
+        self.prerender_progress.setMaximumWidth(150)
+        self.prerender_progress.setFormat("Render %p%")
+        self.prerender_progress.hide()
+        
+        # Tiến độ xuất PDF kèm nét vẽ
+        self.export_progress = QProgressBar()
+        self.export_progress.setMaximumWidth(150)
+        self.export_progress.setFormat("Xuất %p%")
+        self.export_progress.hide()
+        
         # Nút fullscreen - đặt gần với các nút điều khiển trang
         self.fullscreen_btn = QPushButton("Toàn màn hình")
         self.fullscreen_btn.clicked.connect(self.toggle_fullscreen)
@@ -245,6 +325,10 @@ class PresentationApp(QMainWindow):
         layout.addWidget(self.slide_label)
         layout.addWidget(self.next_btn)
         layout.addWidget(self.zoom_label)
+        layout.addWidget(self.load_progress)
+        layout.addWidget(self.cancel_load_btn)
+        layout.addWidget(self.prerender_progress)
+        layout.addWidget(self.export_progress)
         layout.addWidget(self.fullscreen_btn)
         layout.addStretch()
         
@@ -264,6 +348,9 @@ class PresentationApp(QMainWindow):
         self.shortcut_draw = QShortcut(QKeySequence("D"), self)
         self.shortcut_draw.activated.connect(self.toggle_drawing)
         
+        self.shortcut_export = QShortcut(QKeySequence("Ctrl+E"), self)
+        self.shortcut_export.activated.connect(self.export_annotations)
+        
         # Phím tắt zoom
         self.shortcut_zoom_in = QShortcut(QKeySequence("Ctrl+="), self)
         self.shortcut_zoom_in.activated.connect(lambda: self.zoom_in())
@@ -289,7 +376,6 @@ class PresentationApp(QMainWindow):
                     self.zoom_in()
                 else:
                     self.zoom_out()
-                self.update_slide_display()
             else:
                 # Chuyển trang
                 delta = event.angleDelta().y()
@@ -317,8 +403,8 @@ class PresentationApp(QMainWindow):
             # Cập nhật pan offset
             self.pan_offset += delta
             
-            # Cập nhật hiển thị slide với pan offset
-            self.update_slide_display()
+            # Chỉ dịch slide đã render, không render lại
+            self.update_pan()
             
             self.last_pan_pos = current_pos
         super().mouseMoveEvent(event)
@@ -340,73 +426,184 @@ class PresentationApp(QMainWindow):
             self.load_presentation(file_path)
             
     def load_presentation(self, file_path):
-        try:
-            self.current_file = file_path
-            self.presentation_viewer = PresentationViewer(file_path)
-            
-            # Reset pan offset khi tải file mới
-            self.pan_offset = QPoint(0, 0)
-            
-            # Cập nhật giao diện
-            self.update_slide_display()
-            self.slide_slider.setMaximum(self.presentation_viewer.get_total_slides() - 1)
-            self.slide_slider.setValue(0)
-            self.slide_label.setText(f"1 / {self.presentation_viewer.get_total_slides()}")
+        """Tải presentation trên thread riêng, cửa sổ vẫn phản hồi trong lúc tải"""
+        # Đang tải file khác thì hủy lần tải đó
+        if self.loader:
+            self.loader.cancel()
             
-            # Bật các nút điều khiển
-            self.prev_btn.setEnabled(True)
-            self.next_btn.setEnabled(True)
-            self.slide_slider.setEnabled(True)
+        target_size = QSize(self.scroll_area.width(), self.scroll_area.height())
+        self.loader = PresentationLoader(file_path, target_size,
+                                         self.presentation_area.devicePixelRatioF(),
+                                         cache_mb=self.cache_mb, disk_cache=self.disk_cache,
+                                         converter=self.converter, parent=self)
+        self.loader.progress.connect(self.on_load_progress)
+        self.loader.loaded.connect(self.on_presentation_loaded)
+        self.loader.failed.connect(self.on_load_failed)
+        self.loader.finished.connect(self.loader.deleteLater)
+        
+        self.load_progress.setRange(0, 0)
+        self.load_progress.show()
+        self.cancel_load_btn.show()
+        self.statusBar().showMessage(f"Đang tải: {os.path.basename(file_path)}")
+        
+        self.loader.start()
+        
+    def on_load_progress(self, done, total):
+        """Cập nhật tiến độ tải"""
+        if self.sender() is self.loader:
+            self.load_progress.setRange(0, total)
+            self.load_progress.setValue(done)
             
-            QMessageBox.information(self, "Thành công", f"Đã tải file: {os.path.basename(file_path)}")
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể tải file: {str(e)}")
+    def on_presentation_loaded(self, viewer):
+        """Slide đầu tiên đã sẵn sàng: hiển thị ngay"""
+        if self.sender() is not self.loader:
+            # Kết quả của lần tải đã bị thay thế
+            viewer.close()
+            return
+        self.loader = None
+        self.hide_load_progress()
+        
+        # Đóng tài liệu cũ trước khi thay thế
+        if self.presentation_viewer:
+            self.presentation_viewer.close()
+        self.current_file = viewer.file_path
+        self.presentation_viewer = viewer
+        
+        # Reset pan offset và nét vẽ khi tải file mới
+        self.pan_offset = QPoint(0, 0)
+        if self.drawing_overlay:
+            self.drawing_overlay.clear_all_slides()
+        
+        # Cập nhật giao diện (slide đầu đã render sẵn nên hiển thị ngay)
+        self.slide_slider.blockSignals(True)
+        self.slide_slider.setMaximum(self.presentation_viewer.get_total_slides() - 1)
+        self.slide_slider.setValue(0)
+        self.slide_slider.blockSignals(False)
+        self.display_dirty = False
+        self.update_slide_display()
+        self.slide_label.setText(f"1 / {self.presentation_viewer.get_total_slides()}")
+        
+        # Bật các nút điều khiển
+        self.prev_btn.setEnabled(True)
+        self.next_btn.setEnabled(True)
+        self.slide_slider.setEnabled(True)
+        
+        # Chế độ eager: render trước toàn bộ trang trên nhiều process
+        if self.eager:
+            self.start_prerender()
             
+        self.statusBar().showMessage(f"Đã tải file: {os.path.basename(self.current_file)}", 5000)
+        
+    def on_load_failed(self, error_msg):
+        """Xử lý khi tải file lỗi"""
+        if self.sender() is not self.loader:
+            return
+        self.loader = None
+        self.hide_load_progress()
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Lỗi", f"Không thể tải file: {error_msg}")
+        
+    def cancel_loading(self):
+        """Hủy việc tải file đang chạy"""
+        if self.loader:
+            self.loader.cancel()
+            self.loader = None
+        self.hide_load_progress()
+        self.statusBar().showMessage("Đã hủy tải file", 3000)
+        
+    def hide_load_progress(self):
+        """Ẩn thanh tiến độ tải và nút hủy"""
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+        
+    def start_prerender(self):
+        """Render trước toàn bộ tài liệu, vẫn cho phép điều hướng trong lúc render"""
+        prerenderer = self.presentation_viewer.start_prerender(self.render_workers)
+        if not prerenderer:
+            return
+        
+        self.prerender_progress.setRange(0, max(1, len(prerenderer.jobs)))
+        self.prerender_progress.setValue(0)
+        self.prerender_progress.show()
+        prerenderer.progress.connect(self.on_prerender_progress)
+        prerenderer.finished.connect(self.prerender_progress.hide)
+        prerenderer.error_occurred.connect(self.on_prerender_error)
+        
+    def on_prerender_progress(self, done, total):
+        """Cập nhật tiến độ render trước"""
+        self.prerender_progress.setMaximum(total)
+        self.prerender_progress.setValue(done)
+        
+    def on_prerender_error(self, error_msg):
+        """Render song song lỗi: các trang vẫn được render khi cần"""
+        self.prerender_progress.hide()
+        print(error_msg)
+        
     def next_slide(self):
         if self.presentation_viewer:
             self.presentation_viewer.next_slide()
             # Reset pan offset khi chuyển slide
             self.pan_offset = QPoint(0, 0)
-            self.update_slide_display()
+            self.schedule_display_update()
             
     def previous_slide(self):
         if self.presentation_viewer:
             self.presentation_viewer.previous_slide()
             # Reset pan offset khi chuyển slide
             self.pan_offset = QPoint(0, 0)
-            self.update_slide_display()
+            self.schedule_display_update()
             
     def slide_changed(self, value):
         if self.presentation_viewer:
             self.presentation_viewer.go_to_slide(value)
             # Reset pan offset khi chuyển slide
             self.pan_offset = QPoint(0, 0)
+            self.schedule_display_update()
+            
+    def schedule_display_update(self):
+        """Đánh dấu cần cập nhật hiển thị; các yêu cầu liên tiếp được gộp lại"""
+        self.display_actions += 1
+        self.display_dirty = True
+        if not self.display_timer.isActive():
+            self.display_timer.start()
+            
+    def flush_display_update(self):
+        """Cập nhật hiển thị một lần cho mọi yêu cầu từ lần cập nhật trước"""
+        if self.display_dirty:
+            self.display_dirty = False
             self.update_slide_display()
             
+    def get_display_stats(self):
+        """Số lần render so với số thao tác (để kiểm tra việc gộp cập nhật)"""
+        return {
+            'actions': self.display_actions,
+            'renders': self.display_renders,
+            'renders_per_action': self.display_renders / max(1, self.display_actions)
+        }
+        
     def update_slide_display(self):
         if self.presentation_viewer:
+            self.display_renders += 1
+            
             # Lấy kích thước của scroll area (cố định)
             target_size = QSize(self.scroll_area.width(), self.scroll_area.height())
             
-            # Lấy slide với fit size và zoom
-            slide_pixmap = self.presentation_viewer.get_current_slide(target_size)
-            if slide_pixmap:
-                # Tạo pixmap mới với kích thước cố định
-                display_pixmap = QPixmap(target_size)
-                display_pixmap.fill(Qt.GlobalColor.transparent)
-                
-                # Vẽ slide vào pixmap với pan offset
-                painter = QPainter(display_pixmap)
-                
-                # Tính vị trí để center slide
-                x_offset = (target_size.width() - slide_pixmap.width()) // 2 + self.pan_offset.x()
-                y_offset = (target_size.height() - slide_pixmap.height()) // 2 + self.pan_offset.y()
-                
-                painter.drawPixmap(x_offset, y_offset, slide_pixmap)
-                painter.end()
-                
-                self.presentation_area.setPixmap(display_pixmap)
+            # Lấy slide đã render đúng kích thước hiển thị (theo zoom và devicePixelRatio)
+            device_pixel_ratio = self.presentation_area.devicePixelRatioF()
+            # Khi zoom lớn chỉ các tile đang nhìn thấy được render
+            view = self.presentation_viewer.get_current_view(target_size, device_pixel_ratio,
+                                                             self.pan_offset)
+            if view:
+                # Khu vực trình chiếu tự căn giữa slide và áp dụng pan khi vẽ
+                tiles, slide_size = view
+                self.presentation_area.set_tiles(tiles, slide_size)
+                self.presentation_area.set_pan_offset(self.pan_offset)
+                if self.drawing_overlay:
+                    # Nét vẽ theo tọa độ slide: chỉ cần báo vị trí slide mới
+                    self.drawing_overlay.set_pan_offset(self.pan_offset)
+                    self.drawing_overlay.set_slide(self.presentation_viewer.get_current_slide_number())
+                    self.drawing_overlay.set_slide_rect(self.presentation_area.slide_rect())
+                self.displayed_zoom = self.presentation_viewer.get_zoom_factor()
                 
                 # Cập nhật kích thước container để scroll area hoạt động đúng
                 self.presentation_container.setFixedSize(target_size)
@@ -415,7 +612,11 @@ class PresentationApp(QMainWindow):
                 current_slide = self.presentation_viewer.get_current_slide_number() + 1
                 total_slides = self.presentation_viewer.get_total_slides()
                 self.slide_label.setText(f"{current_slide} / {total_slides}")
+                
+                # Chặn tín hiệu để setValue không gọi lại slide_changed
+                self.slide_slider.blockSignals(True)
                 self.slide_slider.setValue(self.presentation_viewer.get_current_slide_number())
+                self.slide_slider.blockSignals(False)
                 
                 # Cập nhật thông tin zoom
                 zoom_percent = int(self.presentation_viewer.get_zoom_factor() * 100)
@@ -425,25 +626,47 @@ class PresentationApp(QMainWindow):
         """Zoom in slide"""
         if self.presentation_viewer:
             self.presentation_viewer.zoom_in(factor)
-            self.update_slide_display()
+            self.preview_zoom()
             
     def zoom_out(self, factor=1.2):
         """Zoom out slide"""
         if self.presentation_viewer:
             self.presentation_viewer.zoom_out(factor)
-            self.update_slide_display()
+            self.preview_zoom()
             
     def reset_zoom(self):
         """Reset zoom về mặc định"""
         if self.presentation_viewer:
             self.presentation_viewer.reset_zoom()
-            self.update_slide_display()
+            self.preview_zoom()
+            
+    def preview_zoom(self):
+        """Phóng to ngay ảnh đang hiển thị, render lại nét khi ngừng zoom"""
+        self.display_actions += 1
+        zoom = self.presentation_viewer.get_zoom_factor()
+        self.presentation_area.set_preview_scale(zoom / self.displayed_zoom)
+        if self.drawing_overlay and self.presentation_area.slide_rect() is not None:
+            self.drawing_overlay.preview_slide_rect(self.presentation_area.slide_rect())
+        self.zoom_label.setText(f"Zoom: {int(zoom * 100)}%")
+        self.zoom_settle_timer.start()
+        
+    def zoom_settled(self):
+        """Ngừng zoom: render lại slide ở zoom cuối cùng"""
+        self.display_dirty = True
+        self.flush_display_update()
+        
+    def update_pan(self):
+        """Dịch slide theo pan, chỉ render lại khi pan ra ngoài vùng đã render"""
+        self.presentation_area.set_pan_offset(self.pan_offset)
+        if self.drawing_overlay:
+            self.drawing_overlay.set_pan_offset(self.pan_offset)
+        if not self.presentation_area.covers_view() and not self.zoom_settle_timer.isActive():
+            self.schedule_display_update()
             
     def reset_pan(self):
         """Reset pan về vị trí mặc định"""
         self.pan_offset = QPoint(0, 0)
-        if self.presentation_viewer:
-            self.update_slide_display()
+        self.update_pan()
             
     def toggle_script_window(self):
         if not self.script_window:
@@ -457,7 +680,13 @@ class PresentationApp(QMainWindow):
                 
     def toggle_drawing(self):
         if not self.drawing_overlay:
-            self.drawing_overlay = DrawingOverlay(self.presentation_area)
+            self.drawing_overlay = DrawingOverlay(self.presentation_area, self.pan_offset)
+            if self.screen_recorder:
+                self.screen_recorder.watch_widget(self.drawing_overlay.drawing_area)
+            if self.presentation_viewer:
+                self.drawing_overlay.set_slide(self.presentation_viewer.get_current_slide_number())
+            if self.presentation_area.slide_rect() is not None:
+                self.drawing_overlay.set_slide_rect(self.presentation_area.slide_rect())
             
         if self.drawing_overlay.isVisible():
             self.drawing_overlay.hide()
@@ -465,10 +694,69 @@ class PresentationApp(QMainWindow):
         else:
             self.drawing_overlay.show()
             self.draw_btn.setText("Tắt Vẽ")
+        if self.screen_recorder:
+            # Nét vẽ hiện/ẩn trong video
+            self.screen_recorder.mark_damaged()
             
+    def export_annotations(self):
+        """Xuất PDF gốc kèm nét vẽ của các slide trên thread riêng"""
+        if not self.presentation_viewer or self.exporter:
+            return
+        if self.presentation_viewer.file_type != 'pdf':
+            QMessageBox.warning(self, "Xuất PDF",
+                                "Cần LibreOffice để xuất nét vẽ cho file PowerPoint")
+            return
+        annotations = self.drawing_overlay.get_annotations() if self.drawing_overlay else {}
+        if not annotations:
+            QMessageBox.information(self, "Xuất PDF", "Chưa có nét vẽ nào để xuất")
+            return
+        
+        base_name = os.path.splitext(os.path.basename(self.current_file))[0]
+        output_path, _ = QFileDialog.getSaveFileName(
+            self, "Xuất PDF kèm nét vẽ", f"{base_name}_annotated.pdf", "PDF Files (*.pdf)")
+        if not output_path:
+            return
+        
+        self.exporter = AnnotationExporter(self.presentation_viewer.render_path, output_path,
+                                           annotations, parent=self)
+        self.exporter.progress.connect(self.on_export_progress)
+        self.exporter.exported.connect(self.on_export_finished)
+        self.exporter.failed.connect(self.on_export_failed)
+        self.exporter.finished.connect(self.exporter.deleteLater)
+        
+        self.export_progress.setRange(0, 0)
+        self.export_progress.show()
+        self.export_btn.setEnabled(False)
+        self.exporter.start()
+        
+    def on_export_progress(self, done, total):
+        """Cập nhật tiến độ xuất PDF"""
+        self.export_progress.setRange(0, total)
+        self.export_progress.setValue(done)
+        
+    def on_export_finished(self, output_path):
+        """Xuất PDF xong"""
+        self.hide_export_progress()
+        self.statusBar().showMessage(f"Đã xuất: {os.path.basename(output_path)}", 5000)
+        
+    def on_export_failed(self, error_msg):
+        """Xuất PDF lỗi"""
+        self.hide_export_progress()
+        QMessageBox.critical(self, "Lỗi", f"Không thể xuất PDF: {error_msg}")
+        
+    def hide_export_progress(self):
+        """Ẩn tiến độ xuất PDF, cho phép xuất lần tiếp theo"""
+        self.exporter = None
+        self.export_progress.hide()
+        self.export_btn.setEnabled(True)
+        
     def toggle_recording(self):
         if not self.screen_recorder:
-            self.screen_recorder = ScreenRecorder()
+            # Chỉ ghi khu vực trình chiếu, không ghi cửa sổ script
+            frame_source = self.grab_presentation_frame if self.use_frame_recording() else None
+            self.screen_recorder = ScreenRecorder(self.presentation_area, frame_source)
+            if self.drawing_overlay:
+                self.screen_recorder.watch_widget(self.drawing_overlay.drawing_area)
             
         if self.screen_recorder.is_recording():
             self.screen_recorder.stop_recording()
@@ -477,23 +765,83 @@ class PresentationApp(QMainWindow):
             self.screen_recorder.start_recording()
             self.record_btn.setText("Dừng Ghi")
             
+    def use_frame_recording(self):
+        """Ghi frame trong ứng dụng thay vì chụp màn hình (mặc định khi không chạy trên X11)"""
+        if self.record_mode == 'auto':
+            return QApplication.platformName() != 'xcb'
+        return self.record_mode == 'frames'
+        
+    def grab_presentation_frame(self):
+        """Frame đang trình chiếu (slide và nét vẽ) để ghi video, không qua framebuffer X11"""
+        area = self.presentation_area
+        ratio = area.devicePixelRatioF()
+        image = QImage(round(area.width() * ratio), round(area.height() * ratio), QImage.Format.Format_RGB32)
+        image.setDevicePixelRatio(ratio)
+        area.render(image)
+        
+        if self.drawing_overlay and self.drawing_overlay.isVisible():
+            painter = QPainter(image)
+            self.drawing_overlay.paint_annotations(painter)
+            painter.end()
+        return image
+        
     def toggle_fullscreen(self):
         if self.isFullScreen():
             self.showNormal()
         else:
             self.showFullScreen()
+            
+    def closeEvent(self, event):
+        """Dừng các thread tải file và render nền khi đóng cửa sổ"""
+        for loader in self.findChildren(PresentationLoader):
+            loader.cancel()
+            loader.wait()
+        if self.exporter:
+            self.exporter.wait()
+        if self.presentation_viewer:
+            self.presentation_viewer.close()
+        self.converter.shutdown()
+        event.accept()
+
+def parse_args(argv):
+    """Đọc tham số dòng lệnh (bỏ qua các tham số của Qt)"""
+    parser = argparse.ArgumentParser(description="Ứng dụng Trình chiếu")
+    parser.add_argument('--cache-mb', type=int, default=512,
+                        help="Dung lượng tối đa của cache slide (MB)")
+    parser.add_argument('--cache-stats', action='store_true',
+                        help="In thống kê cache slide và số lần render khi thoát")
+    parser.add_argument('--disk-cache-mb', type=int, default=1024,
+                        help="Dung lượng cache ảnh đã render trên đĩa (MB, 0 để tắt)")
+    parser.add_argument('--eager', action='store_true',
+                        help="Render trước toàn bộ PDF trên nhiều process khi mở file "
+                             "(nên tăng --cache-mb để giữ được cả tài liệu)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Số process render song song (mặc định: số CPU)")
+    parser.add_argument('--record-mode', choices=('auto', 'screen', 'frames'), default='auto',
+                        help="Cách ghi video: chụp màn hình X11 (có âm thanh) hoặc ghi trực tiếp "
+                             "frame trình chiếu (chạy được với Xvfb/offscreen); auto chọn theo nền tảng")
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
 
 def main():
+    args = parse_args(sys.argv)
     app = QApplication(sys.argv)
     app.setApplicationName("Ứng dụng Trình chiếu")
     
     # Thiết lập style
     app.setStyle('Fusion')
     
-    window = PresentationApp()
+    window = PresentationApp(cache_mb=args.cache_mb, eager=args.eager,
+                             render_workers=args.workers,
+                             disk_cache_mb=args.disk_cache_mb,
+                             record_mode=args.record_mode)
     window.show()
     
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if args.cache_stats and window.presentation_viewer:
+        print(f"Cache slide: {window.presentation_viewer.get_cache_stats()}")
+        print(f"Cập nhật hiển thị: {window.get_display_stats()}")
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
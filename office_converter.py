@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from disk_cache import get_cache_root, file_fingerprint
+
+def find_soffice():
+    """Tìm chương trình LibreOffice trong PATH, None nếu chưa cài"""
+    for name in ('soffice', 'libreoffice'):
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+class OfficeConverter:
+    """Chuyển .ppt/.pptx sang PDF bằng LibreOffice headless, có cache kết quả"""
+    def __init__(self, cache_dir=None, soffice=None, timeout=180, max_workers=2):
+        self.cache_dir = cache_dir or os.path.join(get_cache_root(), 'converted')
+        self.soffice = soffice or find_soffice()
+        self.timeout = timeout  # Thời gian tối đa (giây) cho một lần chuyển đổi
+        self.max_workers = max_workers
+        
+        self.executor = None  # Chỉ tạo khi thực sự cần chuyển đổi
+        self._futures = {}  # hash nội dung -> Future của lần chuyển đổi đang chạy
+        self._hashes = {}  # fingerprint -> hash nội dung, tránh đọc lại file lớn
+        self._lock = threading.Lock()
+        
+    @property
+    def available(self):
+        """Có LibreOffice để chuyển đổi hay không"""
+        return self.soffice is not None
+        
+    def _source_hash(self, file_path):
+        """Hash SHA-256 của nội dung file nguồn"""
+        fingerprint = file_fingerprint(file_path)
+        with self._lock:
+            digest = self._hashes.get(fingerprint)
+        if digest:
+            return digest
+        
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with self._lock:
+            self._hashes[fingerprint] = digest
+        return digest
+        
+    def convert_async(self, file_path):
+        """Chuyển đổi trên thread nền, trả về Future chứa đường dẫn PDF"""
+        if not self.available:
+            raise RuntimeError("Không tìm thấy LibreOffice (soffice)")
+        
+        digest = self._source_hash(file_path)
+        target = os.path.join(self.cache_dir, f"{digest}.pdf")
+        
+        with self._lock:
+            # Các yêu cầu đồng thời cho cùng nội dung dùng chung một lần chuyển đổi
+            future = self._futures.get(digest)
+            if future is not None:
+                return future
+            
+            if os.path.exists(target):
+                future = Future()
+                future.set_result(target)
+                return future
+            
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="office-convert")
+            future = self.executor.submit(self._convert, file_path, target)
+            self._futures[digest] = future
+            future.add_done_callback(lambda f: self._discard(digest, f))
+            return future
+            
+    def convert(self, file_path):
+        """Chuyển đổi và chờ kết quả"""
+        return self.convert_async(file_path).result()
+        
+    def _discard(self, digest, future):
+        """Bỏ lần chuyển đổi đã xong khỏi danh sách đang chạy"""
+        with self._lock:
+            if self._futures.get(digest) is future:
+                del self._futures[digest]
+            
+    def _convert(self, file_path, target):
+        """Chạy soffice trong thư mục tạm rồi chuyển PDF vào cache"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.cache_dir) as work_dir:
+            # Profile riêng cho mỗi lần chạy để các process soffice không chặn nhau
+            profile = Path(work_dir, 'profile').as_uri()
+            command = [self.soffice, '--headless', '--norestore',
+                       f'-env:UserInstallation={profile}',
+                       '--convert-to', 'pdf', '--outdir', work_dir,
+                       os.path.abspath(file_path)]
+            try:
+                result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                        timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                raise Exception(f"LibreOffice chuyển đổi quá {self.timeout} giây")
+            
+            output = os.path.join(work_dir, os.path.splitext(os.path.basename(file_path))[0] + '.pdf')
+            if result.returncode != 0 or not os.path.exists(output):
+                message = result.stderr.decode('utf-8', 'replace').strip()
+                raise Exception(f"LibreOffice không chuyển đổi được file: {message or result.returncode}")
+            
+            os.replace(output, target)
+        return target
+        
+    def shutdown(self):
+        """Dừng thread pool, không chờ các lần chuyển đổi đang chạy"""
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
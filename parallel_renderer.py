@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+import fitz  # PyMuPDF
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage
+
+def _render_pages(file_path, jobs):
+    """Chạy trong process con: mở tài liệu riêng và render các trang vào shared memory"""
+    doc = fitz.open(file_path)
+    results = []
+    try:
+        for page_num, scale in jobs:
+            page = doc.load_page(page_num)
+            pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+            
+            # Ghi buffer RGB vào shared memory, process chính sẽ đọc và giải phóng
+            samples = pix.samples_mv
+            shm = shared_memory.SharedMemory(create=True, size=max(1, samples.nbytes))
+            shm.buf[:samples.nbytes] = samples
+            results.append((page_num, scale, shm.name, pix.width, pix.height, pix.stride))
+            shm.close()
+    finally:
+        doc.close()
+    return results
+
+class ParallelPrerenderer(QObject):
+    """Render trước toàn bộ tài liệu PDF trên nhiều process"""
+    progress = pyqtSignal(int, int)  # (số trang đã xong, tổng số trang)
+    finished = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+    
+    def __init__(self, file_path, jobs, on_page_ready, workers=None, chunk_size=4):
+        super().__init__()
+        self.file_path = file_path
+        self.jobs = list(jobs)  # Danh sách (số trang, scale) cần render
+        self.on_page_ready = on_page_ready  # Callback nhận (số trang, scale, QImage)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        
+        self.executor = None
+        self.futures = []
+        self.done = 0
+        self.cancelled = False
+        self._lock = threading.Lock()
+        
+        # Giải phóng các process khi đã render xong (slot chạy trên GUI thread)
+        self.finished.connect(self._shutdown)
+        
+    def start(self):
+        """Chia các trang thành nhiều nhóm nhỏ và gửi vào process pool"""
+        if not self.jobs:
+            self.finished.emit()
+            return
+        
+        # Dùng 'spawn' để process con không kế thừa trạng thái Qt của process chính
+        context = multiprocessing.get_context('spawn')
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        
+        # Nhóm nhỏ để tiến độ cập nhật đều và các trang đầu sẵn sàng sớm
+        for i in range(0, len(self.jobs), self.chunk_size):
+            chunk = self.jobs[i:i + self.chunk_size]
+            future = self.executor.submit(_render_pages, self.file_path, chunk)
+            future.add_done_callback(lambda f, count=len(chunk): self._chunk_done(f, count))
+            self.futures.append(future)
+            
+    def _chunk_done(self, future, count):
+        """Nhận kết quả của một nhóm count trang (chạy trên thread quản lý của pool)"""
+        if future.cancelled():
+            return
+        try:
+            results = future.result()
+        except Exception as e:
+            # Nhóm lỗi vẫn tính là xong để finished được phát và pool được giải phóng;
+            # các trang này sẽ được render khi hiển thị
+            self.error_occurred.emit(f"Lỗi khi render song song: {str(e)}")
+            results = []
+        
+        for page_num, scale, name, width, height, stride in results:
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                if not self.cancelled:
+                    # Copy một lần từ shared memory sang định dạng gốc của QPixmap
+                    view = QImage(shm.buf, width, height, stride, QImage.Format.Format_RGB888)
+                    image = view.convertToFormat(QImage.Format.Format_RGB32)
+                    del view
+                    self.on_page_ready(page_num, scale, image)
+            finally:
+                shm.close()
+                shm.unlink()
+        
+        with self._lock:
+            self.done += count
+            done = self.done
+        if not self.cancelled:
+            self.progress.emit(done, len(self.jobs))
+            if done == len(self.jobs):
+                self.finished.emit()
+            
+    def _shutdown(self):
+        """Dừng process pool sau khi mọi nhóm trang đã xong"""
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            
+    def cancel(self, wait=False):
+        """Hủy các nhóm trang chưa render"""
+        self.cancelled = True
+        for future in self.futures:
+            future.cancel()
+        if self.executor:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from pptx.enum.shapes import MSO_SHAPE_TYPE, MSO_SHAPE, PP_PLACEHOLDER
+from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
+from pptx.enum.dml import MSO_FILL, MSO_COLOR_TYPE
+from PyQt6.QtGui import QImage, QPainter, QColor, QPen, QBrush, QFont, QFontMetricsF
+from PyQt6.QtCore import Qt, QRectF
+
+EMU_PER_POINT = 12700  # 1 point = 12700 EMU
+DOTS_PER_METER_72DPI = round(72 / 0.0254)  # Để 1 point font = 1 đơn vị vẽ
+
+# Căn lề đoạn văn PowerPoint -> cờ căn lề của Qt
+ALIGNMENTS = {
+    PP_ALIGN.CENTER: Qt.AlignmentFlag.AlignHCenter,
+    PP_ALIGN.RIGHT: Qt.AlignmentFlag.AlignRight,
+    PP_ALIGN.JUSTIFY: Qt.AlignmentFlag.AlignJustify,
+}
+
+def emu_to_pt(value):
+    """Đổi EMU sang point"""
+    return (value or 0) / EMU_PER_POINT
+
+class PptxRenderer:
+    """Render slide PowerPoint thành QImage bằng QPainter"""
+    def __init__(self, presentation):
+        # Kích thước slide (point) lấy từ file thay vì cố định 16:9
+        self.slide_width = emu_to_pt(presentation.slide_width)
+        self.slide_height = emu_to_pt(presentation.slide_height)
+        
+        # Ảnh nhúng đã giải mã, dùng chung giữa các slide (key: sha1 của ảnh)
+        self._images = {}
+        self._images_lock = threading.Lock()
+        
+    def render(self, slide, scale=1.0, clip=None):
+        """Render slide (hoặc vùng clip, đơn vị point) ở scale cho trước (pixel / point)"""
+        if clip is None:
+            clip = QRectF(0, 0, self.slide_width, self.slide_height)
+        width = max(1, round(clip.width() * scale))
+        height = max(1, round(clip.height() * scale))
+        
+        image = QImage(width, height, QImage.Format.Format_RGB32)
+        image.setDotsPerMeterX(DOTS_PER_METER_72DPI)
+        image.setDotsPerMeterY(DOTS_PER_METER_72DPI)
+        image.fill(Qt.GlobalColor.white)
+        
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        
+        # Vẽ trong hệ tọa độ point của slide
+        painter.scale(width / clip.width(), height / clip.height())
+        painter.translate(-clip.left(), -clip.top())
+        self._draw_background(painter, slide)
+        for shape in slide.shapes:
+            self._draw_shape_safe(painter, shape)
+        
+        painter.end()
+        return image
+        
+    def _decoded_image(self, picture_image):
+        """Giải mã ảnh nhúng một lần, dùng lại cho các slide khác"""
+        key = picture_image.sha1
+        with self._images_lock:
+            decoded = self._images.get(key)
+        if decoded is None:
+            decoded = QImage.fromData(picture_image.blob)
+            with self._images_lock:
+                self._images[key] = decoded
+        return decoded
+        
+    def _color(self, color_format):
+        """Lấy QColor từ ColorFormat, None nếu không xác định được (ví dụ màu theme)"""
+        try:
+            if color_format.type == MSO_COLOR_TYPE.RGB:
+                rgb = color_format.rgb
+                return QColor(rgb[0], rgb[1], rgb[2])
+        except (AttributeError, TypeError, ValueError):
+            pass
+        return None
+        
+    def _fill_color(self, fill):
+        """Màu nền của một FillFormat (chỉ hỗ trợ màu đơn)"""
+        try:
+            if fill.type == MSO_FILL.SOLID:
+                return self._color(fill.fore_color)
+        except (AttributeError, TypeError, ValueError):
+            pass
+        return None
+        
+    def _draw_background(self, painter, slide):
+        """Vẽ nền slide (của slide, hoặc kế thừa từ layout/master)"""
+        sources = [slide]
+        try:
+            sources += [slide.slide_layout, slide.slide_layout.slide_master]
+        except AttributeError:
+            pass
+        
+        for source in sources:
+            try:
+                color = self._fill_color(source.background.fill)
+            except AttributeError:
+                continue
+            if color is not None:
+                painter.fillRect(QRectF(0, 0, self.slide_width, self.slide_height), color)
+                return
+            
+    def _draw_shape_safe(self, painter, shape):
+        """Vẽ một shape, bỏ qua shape không đọc được thay vì làm hỏng cả slide"""
+        painter.save()
+        try:
+            self._draw_shape(painter, shape)
+        except Exception as e:
+            print(f"Bỏ qua shape '{getattr(shape, 'name', '?')}': {e}")
+        finally:
+            painter.restore()
+            
+    def _draw_shape(self, painter, shape):
+        """Vẽ shape theo loại: nhóm, ảnh, hình cơ bản và khung chữ"""
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            for child in shape.shapes:
+                self._draw_shape_safe(painter, child)
+            return
+        
+        if shape.left is None or shape.width is None:
+            return  # Placeholder không có vị trí riêng
+        rect = QRectF(emu_to_pt(shape.left), emu_to_pt(shape.top),
+                      emu_to_pt(shape.width), emu_to_pt(shape.height))
+        
+        # Xoay quanh tâm shape
+        if getattr(shape, 'rotation', 0):
+            center = rect.center()
+            painter.translate(center)
+            painter.rotate(shape.rotation)
+            painter.translate(-center)
+        
+        if shape.shape_type == MSO_SHAPE_TYPE.PICTURE or hasattr(shape, 'image'):
+            self._draw_picture(painter, shape, rect)
+        elif shape.shape_type == MSO_SHAPE_TYPE.AUTO_SHAPE:
+            self._draw_autoshape(painter, shape, rect)
+        
+        if shape.has_text_frame:
+            self._draw_text_frame(painter, shape, rect)
+            
+    def _draw_picture(self, painter, shape, rect):
+        """Vẽ ảnh nhúng, áp dụng crop"""
+        image = self._decoded_image(shape.image)
+        if image.isNull():
+            return
+        
+        # Crop theo tỷ lệ của ảnh gốc
+        left, right = shape.crop_left or 0, shape.crop_right or 0
+        top, bottom = shape.crop_top or 0, shape.crop_bottom or 0
+        source = QRectF(image.width() * left, image.height() * top,
+                        image.width() * (1 - left - right), image.height() * (1 - top - bottom))
+        painter.drawImage(rect, image, source)
+        
+    def _draw_autoshape(self, painter, shape, rect):
+        """Vẽ hình cơ bản: chữ nhật, bo góc, ellipse"""
+        fill_color = self._fill_color(shape.fill)
+        painter.setBrush(QBrush(fill_color) if fill_color else Qt.BrushStyle.NoBrush)
+        
+        line_color = None
+        try:
+            if shape.line.fill.type == MSO_FILL.SOLID:
+                line_color = self._color(shape.line.color)
+        except (AttributeError, TypeError, ValueError):
+            pass
+        if line_color:
+            painter.setPen(QPen(line_color, max(emu_to_pt(shape.line.width), 0.75)))
+        else:
+            painter.setPen(Qt.PenStyle.NoPen)
+        
+        if fill_color is None and line_color is None:
+            return
+        
+        try:
+            shape_type = shape.auto_shape_type
+        except (AttributeError, NotImplementedError, ValueError):
+            shape_type = MSO_SHAPE.RECTANGLE
+        if shape_type == MSO_SHAPE.OVAL:
+            painter.drawEllipse(rect)
+        elif shape_type == MSO_SHAPE.ROUNDED_RECTANGLE:
+            radius = min(rect.width(), rect.height()) * 0.1667
+            painter.drawRoundedRect(rect, radius, radius)
+        else:
+            painter.drawRect(rect)
+            
+    def _default_font_size(self, shape):
+        """Cỡ chữ mặc định khi không khai báo (thường kế thừa từ layout)"""
+        try:
+            if shape.is_placeholder and shape.placeholder_format.type in (
+                    PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE):
+                return 40.0
+        except (AttributeError, ValueError):
+            pass
+        return 18.0
+        
+    def _draw_text_frame(self, painter, shape, rect):
+        """Vẽ các đoạn văn trong khung chữ, tự xuống dòng theo chiều rộng"""
+        text_frame = shape.text_frame
+        inner = rect.adjusted(emu_to_pt(text_frame.margin_left), emu_to_pt(text_frame.margin_top),
+                              -emu_to_pt(text_frame.margin_right), -emu_to_pt(text_frame.margin_bottom))
+        if inner.width() <= 0:
+            return
+        
+        default_size = self._default_font_size(shape)
+        is_title = default_size > 18.0
+        blocks = []  # (text, font, color, cờ căn lề, chiều cao)
+        for paragraph in text_frame.paragraphs:
+            text = ''.join(run.text for run in paragraph.runs) or paragraph.text
+            run_font = paragraph.runs[0].font if paragraph.runs else paragraph.font
+            
+            font = QFont()
+            size = run_font.size or paragraph.font.size
+            font.setPointSizeF(size.pt if size else default_size)
+            font.setBold(bool(run_font.bold or paragraph.font.bold or (is_title and run_font.bold is None)))
+            font.setItalic(bool(run_font.italic or paragraph.font.italic))
+            if run_font.name:
+                font.setFamily(run_font.name)
+            
+            color = self._color(run_font.color) or QColor(0, 0, 0)
+            align = ALIGNMENTS.get(paragraph.alignment,
+                                   Qt.AlignmentFlag.AlignHCenter if is_title else Qt.AlignmentFlag.AlignLeft)
+            
+            metrics = QFontMetricsF(font, painter.device())  # Đo theo DPI của ảnh đích
+            if text.strip():
+                height = metrics.boundingRect(QRectF(0, 0, inner.width(), 1e6),
+                                              int(Qt.TextFlag.TextWordWrap.value), text).height()
+            else:
+                height = metrics.lineSpacing()
+            blocks.append((text, font, color, align, height))
+        
+        if not any(text.strip() for text, *_ in blocks):
+            return
+        
+        # Căn theo chiều dọc
+        total_height = sum(block[4] for block in blocks)
+        anchor = text_frame.vertical_anchor
+        if anchor is None and is_title:
+            anchor = MSO_ANCHOR.MIDDLE
+        y = inner.top()
+        if anchor == MSO_ANCHOR.MIDDLE:
+            y += (inner.height() - total_height) / 2
+        elif anchor == MSO_ANCHOR.BOTTOM:
+            y += inner.height() - total_height
+        
+        for text, font, color, align, height in blocks:
+            if text.strip():
+                painter.setFont(font)
+                painter.setPen(color)
+                painter.drawText(QRectF(inner.left(), y, inner.width(), height),
+                                 int(align.value) | int(Qt.TextFlag.TextWordWrap.value), text)
+            y += height
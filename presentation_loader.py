@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from presentation_viewer import PresentationViewer, LoadCancelled
+
+class PresentationLoader(QThread):
+    """Thread riêng biệt để tải presentation, không làm đứng cửa sổ"""
+    progress = pyqtSignal(int, int)  # (đã xong, tổng số bước)
+    loaded = pyqtSignal(object)  # PresentationViewer, slide đầu tiên đã sẵn sàng
+    failed = pyqtSignal(str)
+    
+    def __init__(self, file_path, target_size, device_pixel_ratio=1.0,
+                 cache_mb=512, disk_cache=None, converter=None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.target_size = target_size
+        self.device_pixel_ratio = device_pixel_ratio
+        self.cache_mb = cache_mb
+        self.disk_cache = disk_cache
+        self.converter = converter
+        self.cancelled = False
+        
+    def run(self):
+        """Mở tài liệu và render slide đầu tiên trên thread này"""
+        viewer = None
+        try:
+            viewer = PresentationViewer(self.file_path, cache_mb=self.cache_mb,
+                                        disk_cache=self.disk_cache,
+                                        progress_callback=self._report_progress,
+                                        converter=self.converter)
+            self._check_cancelled()
+            
+            # Render slide đầu tiên để hiển thị ngay khi tải xong
+            viewer.prepare_current_slide(self.target_size, self.device_pixel_ratio)
+            self._check_cancelled()
+            
+            viewer.progress_callback = None
+            self.loaded.emit(viewer)
+            
+        except LoadCancelled:
+            if viewer:
+                viewer.close()
+        except Exception as e:
+            if viewer:
+                viewer.close()
+            if not self.cancelled:
+                self.failed.emit(str(e))
+            
+    def _report_progress(self, done, total):
+        """Nhận tiến độ từ PresentationViewer (bước cuối là render slide đầu)"""
+        self._check_cancelled()
+        self.progress.emit(done, total + 1)
+        
+    def _check_cancelled(self):
+        if self.cancelled:
+            raise LoadCancelled()
+            
+    def cancel(self):
+        """Hủy việc tải (dừng ở bước tiếp theo)"""
+        self.cancelled = True
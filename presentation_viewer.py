@@ -2,19 +2,48 @@
 # -*- coding: utf-8 -*-
 
 import os
+import math
+import threading
+from concurrent.futures import wait
 import fitz  # PyMuPDF
 from pptx import Presentation
-from PIL import Image
-import io
-from PyQt6.QtGui import QPixmap
-from PyQt6.QtCore import QSize, Qt
+from PyQt6.QtGui import QPixmap, QImage
+from PyQt6.QtCore import QSize, QSizeF, QRectF, QPoint, Qt
+
+from slide_cache import SlideCache
+from slide_prefetcher import SlidePrefetcher
+from parallel_renderer import ParallelPrerenderer
+from pptx_renderer import PptxRenderer
+
+class LoadCancelled(Exception):
+    """Việc tải presentation bị hủy giữa chừng"""
+    pass
 
 class PresentationViewer:
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache_mb=512, disk_cache=None, progress_callback=None,
+                 converter=None):
         self.file_path = file_path
+        self.render_path = file_path  # File thực sự được render (PDF đã chuyển đổi nếu có)
         self.file_type = self._get_file_type(file_path)
         self.current_slide = 0
-        self.slides = []
+        self.cache = SlideCache(cache_mb * 1024 * 1024)  # Cache LRU cho slide đã render
+        self.render_scale = 1.0  # Scale mặc định khi chưa biết kích thước hiển thị
+        self.target_size = None  # Kích thước hiển thị gần nhất
+        self.device_pixel_ratio = 1.0
+        self.region_threshold = 1.5  # Trang lớn hơn 1.5 lần vùng hiển thị thì chỉ render vùng nhìn thấy
+        self.region_margin = 0.25  # Render thêm 25% vùng hiển thị mỗi phía để pan không phải render lại
+        self.tile_size = 512  # Kích thước tile (pixel thiết bị) khi chỉ render vùng nhìn thấy
+        self.page_sizes = []  # Kích thước (width, height) của từng trang
+        self.doc = None
+        self.prs_slides = []
+        self.pptx_renderer = None
+        self.prefetcher = None
+        self.prerenderer = None
+        self.disk_cache = disk_cache  # Cache trên đĩa dùng chung giữa các lần mở file
+        self.disk_cache_key = None
+        self.converter = converter  # OfficeConverter để chuyển PowerPoint sang PDF (tùy chọn)
+        self.progress_callback = progress_callback  # Nhận (đã xong, tổng số); có thể raise LoadCancelled
+        self._render_lock = threading.Lock()  # fitz/python-pptx không thread-safe
         self.zoom_factor = 1.0
         self.min_zoom = 0.1  # Zoom out tối thiểu (10%)
         self.max_zoom = 5.0  # Zoom in tối đa (500%)
@@ -32,139 +61,340 @@ class PresentationViewer:
             raise ValueError(f"Không hỗ trợ định dạng file: {ext}")
             
     def _load_presentation(self):
-        """Tải presentation vào bộ nhớ"""
-        if self.file_type == 'pdf':
-            self._load_pdf()
-        elif self.file_type == 'powerpoint':
-            self._load_powerpoint()
+        """Mở presentation, chỉ đọc số trang và kích thước trang"""
+        try:
+            if self.file_type == 'pdf':
+                self._load_pdf()
+            elif self.file_type == 'powerpoint':
+                if self.converter and self.converter.available:
+                    self._load_converted()
+                else:
+                    self._load_powerpoint()
+        except Exception:
+            self.close()
+            raise
+        
+        if self.disk_cache:
+            self.disk_cache_key = self.disk_cache.open_document(self.render_path)
+        
+        # Trang chỉ được render khi cần; các slide lân cận được render trước trên thread pool
+        self.prefetcher = SlidePrefetcher(self._prefetch_slide, self.get_total_slides())
+        self.prefetcher.slide_changed(self.current_slide)
             
     def _load_pdf(self):
-        """Tải file PDF"""
+        """Mở file PDF và đọc kích thước các trang"""
         try:
-            doc = fitz.open(self.file_path)
-            self.slides = []
+            self.doc = fitz.open(self.render_path)
+            self.page_sizes = []
+            self.render_scale = 2.0  # Scale 2x để có chất lượng tốt
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                # Render page với độ phân giải cao
-                mat = fitz.Matrix(2.0, 2.0)  # Scale 2x để có chất lượng tốt
-                pix = page.get_pixmap(matrix=mat)
+            for page_num in range(len(self.doc)):
+                rect = self.doc.load_page(page_num).rect
+                self.page_sizes.append((rect.width, rect.height))
+                self._report_progress(page_num + 1, len(self.doc))
                 
-                # Chuyển đổi sang PIL Image
-                img_data = pix.tobytes("ppm")
-                img = Image.open(io.BytesIO(img_data))
-                
-                # Chuyển đổi sang QPixmap
-                qpixmap = self._pil_to_qpixmap(img)
-                self.slides.append(qpixmap)
-                
-            doc.close()
-            
+        except LoadCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Lỗi khi tải PDF: {str(e)}")
             
+    def _load_converted(self):
+        """Chuyển PowerPoint sang PDF bằng LibreOffice rồi dùng đường render PDF"""
+        future = self.converter.convert_async(self.file_path)
+        while not future.done():
+            self._report_progress(0, 0)  # Chưa biết số trang, chỉ để có thể hủy
+            wait([future], timeout=0.1)
+        
+        try:
+            pdf_path = future.result()
+        except Exception as e:
+            if os.path.splitext(self.file_path)[1].lower() == '.pptx':
+                print(f"{e}, dùng renderer python-pptx")
+                self._load_powerpoint()
+                return
+            raise Exception(f"Lỗi khi chuyển đổi PowerPoint: {str(e)}")
+        
+        self.render_path = pdf_path
+        self.file_type = 'pdf'
+        self._load_pdf()
+        
     def _load_powerpoint(self):
-        """Tải file PowerPoint"""
+        """Mở file PowerPoint và đọc danh sách slide"""
+        if os.path.splitext(self.file_path)[1].lower() == '.ppt':
+            raise Exception("File .ppt cần LibreOffice (soffice) để chuyển sang PDF")
+        
         try:
             prs = Presentation(self.file_path)
-            self.slides = []
+            self.prs_slides = list(prs.slides)
+            self.pptx_renderer = PptxRenderer(prs)
+            
+            # Kích thước slide (point) theo file, cùng đơn vị với trang PDF
+            slide_size = (self.pptx_renderer.slide_width, self.pptx_renderer.slide_height)
+            self.page_sizes = [slide_size] * len(self.prs_slides)
+            self.render_scale = 2.0
             
-            for slide in prs.slides:
-                # Tạo ảnh từ slide
-                slide_image = self._render_slide_to_image(slide)
-                self.slides.append(slide_image)
-                
         except Exception as e:
             raise Exception(f"Lỗi khi tải PowerPoint: {str(e)}")
             
-    def _render_slide_to_image(self, slide):
-        """Render slide PowerPoint thành ảnh"""
-        # Đây là một implementation đơn giản
-        # Trong thực tế, bạn có thể cần sử dụng thư viện khác để render tốt hơn
+    def _report_progress(self, done, total):
+        """Báo tiến độ tải cho progress_callback (nếu có)"""
+        if self.progress_callback:
+            self.progress_callback(done, total)
+            
+    def _fit_scale(self, page_num, target_size):
+        """Tính scale để fit trang vào target_size với tỷ lệ khung hình"""
+        page_width, page_height = self.page_sizes[page_num]
         
-        # Tạo một ảnh trống với kích thước chuẩn
-        width, height = 1920, 1080  # 16:9 aspect ratio
+        # Chọn tỷ lệ nhỏ hơn để fit toàn bộ slide
+        return min(target_size.width() / page_width, target_size.height() / page_height)
         
-        # Tạo QPixmap trống
-        pixmap = QPixmap(width, height)
-        pixmap.fill()  # Fill với màu trắng
+    def _scale_for(self, page_num):
+        """Scale render (pixel thiết bị / đơn vị trang) cho kích thước hiển thị hiện tại"""
+        if not self.target_size:
+            return self.render_scale
+        scale = self._fit_scale(page_num, self.target_size) * self.zoom_factor * self.device_pixel_ratio
         
-        # Trong implementation thực tế, bạn sẽ render nội dung slide lên đây
-        # Sử dụng thư viện như python-pptx để extract text và hình ảnh
+        # Cạnh quyết định fit được làm tròn xuống số pixel nguyên (không tràn vùng hiển thị),
+        # ảnh render đúng bằng kích thước đó nên được vẽ 1:1, không phải scale lại
+        page_width, page_height = self.page_sizes[page_num]
+        if self.target_size.width() / page_width <= self.target_size.height() / page_height:
+            return max(1, math.floor(page_width * scale + 1e-6)) / page_width
+        return max(1, math.floor(page_height * scale + 1e-6)) / page_height
         
-        return pixmap
+    def _get_slide_image(self, page_num, scale):
+        """Lấy ảnh của một slide ở scale cho trước, render nếu chưa có"""
+        key = (page_num, scale)
+        if self.prefetcher and key not in self.cache:
+            # Slide đang được render trước thì chờ thay vì render lại
+            self.prefetcher.wait_for(page_num)
         
-    def _pil_to_qpixmap(self, pil_image):
-        """Chuyển đổi PIL Image sang QPixmap"""
-        # Chuyển đổi PIL Image sang bytes
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format='PNG')
-        buffer.seek(0)
+        image = self.cache.get(key)
+        if image is None:
+            image = self._render_slide(page_num, scale)
+            self.cache.put(key, image)
+        return image
         
-        # Tạo QPixmap từ bytes
-        pixmap = QPixmap()
-        pixmap.loadFromData(buffer.getvalue())
+    def _render_slide(self, page_num, scale):
+        """Render một slide thành QImage (an toàn khi gọi từ worker thread)"""
+        if self.disk_cache:
+            # Trang đã render ở lần mở trước: đọc từ đĩa thay vì render lại
+            image = self.disk_cache.get(self.disk_cache_key, page_num, scale)
+            if image is None:
+                image = self._render_slide_uncached(page_num, scale)
+                self.disk_cache.put(self.disk_cache_key, page_num, scale, image)
+            return image
+        return self._render_slide_uncached(page_num, scale)
         
-        return pixmap
+    def _render_slide_uncached(self, page_num, scale, clip=None):
+        """Render một slide (hoặc vùng clip, đơn vị trang) từ tài liệu gốc"""
+        if self.file_type == 'pdf':
+            return self._render_pdf_page(page_num, scale, clip)
+        with self._render_lock:
+            return self.pptx_renderer.render(self.prs_slides[page_num], scale, clip)
+            
+    def _uses_region(self, page_num, scale):
+        """Trang ở scale này lớn hơn nhiều so với vùng hiển thị (chỉ render vùng nhìn thấy)"""
+        if not self.target_size:
+            return False
+        page_width, page_height = self.page_sizes[page_num]
+        limit = self.region_threshold * self.device_pixel_ratio
+        return (page_width * scale > self.target_size.width() * limit or
+                page_height * scale > self.target_size.height() * limit)
         
-    def get_current_slide(self, target_size=None):
-        """Lấy slide hiện tại với zoom và fit size"""
-        if not self.slides or not (0 <= self.current_slide < len(self.slides)):
-            return None
+    def _visible_region(self, page_num, scale, pan_offset):
+        """Vùng trang (pixel thiết bị) đang nhìn thấy, cộng thêm lề"""
+        page_width, page_height = self.page_sizes[page_num]
+        full_width, full_height = page_width * scale, page_height * scale
+        view_width = self.target_size.width() * self.device_pixel_ratio
+        view_height = self.target_size.height() * self.device_pixel_ratio
+        
+        # Slide được căn giữa vùng hiển thị rồi dịch theo pan
+        left = (view_width - full_width) / 2 + pan_offset.x() * self.device_pixel_ratio
+        top = (view_height - full_height) / 2 + pan_offset.y() * self.device_pixel_ratio
+        margin_x = view_width * self.region_margin
+        margin_y = view_height * self.region_margin
+        
+        x0 = max(0.0, -left - margin_x)
+        y0 = max(0.0, -top - margin_y)
+        x1 = min(full_width, view_width - left + margin_x)
+        y1 = min(full_height, view_height - top + margin_y)
+        return (x0, y0, x1, y1)
+        
+    def _get_visible_tiles(self, page_num, scale, pan_offset):
+        """Lấy các tile (ảnh, (x0, y0, x1, y1) pixel thiết bị) nằm trong vùng nhìn thấy"""
+        page_width, page_height = self.page_sizes[page_num]
+        full_width, full_height = round(page_width * scale), round(page_height * scale)
+        x0, y0, x1, y1 = self._visible_region(page_num, scale, pan_offset)
+        size = self.tile_size
+        
+        tiles = []
+        for row in range(int(y0 // size), math.ceil(y1 / size)):
+            for column in range(int(x0 // size), math.ceil(x1 / size)):
+                rect = (column * size, row * size,
+                        min((column + 1) * size, full_width), min((row + 1) * size, full_height))
+                if rect[2] <= rect[0] or rect[3] <= rect[1]:
+                    continue
+                
+                # Tile được cache riêng theo (trang, scale, cột, hàng) nên pan chỉ render tile mới
+                key = (page_num, scale, column, row)
+                image = self.cache.get(key)
+                if image is None:
+                    clip = QRectF(rect[0] / scale, rect[1] / scale,
+                                  (rect[2] - rect[0]) / scale, (rect[3] - rect[1]) / scale)
+                    image = self._render_slide_uncached(page_num, scale, clip)
+                    self.cache.put(key, image)
+                tiles.append((image, rect))
+        return tiles
             
-        original_pixmap = self.slides[self.current_slide]
+    def _prefetch_slide(self, page_num):
+        """Render trước một slide vào cache (chạy trên worker thread)"""
+        if not self.target_size:
+            return  # Chưa biết kích thước hiển thị
+        scale = self._scale_for(page_num)
+        if self._uses_region(page_num, scale):
+            return  # Zoom lớn: chỉ render vùng nhìn thấy khi hiển thị
+        if (page_num, scale) not in self.cache:
+            self.cache.put((page_num, scale), self._render_slide(page_num, scale))
         
-        # Nếu có target_size, tính toán fit size
-        if target_size:
-            return self._fit_slide_to_size(original_pixmap, target_size)
+    def start_prerender(self, workers=None):
+        """Render trước toàn bộ tài liệu PDF trên nhiều process (chế độ eager)"""
+        # Cần biết kích thước hiển thị, tức là sau lần get_current_slide đầu tiên
+        if self.file_type != 'pdf' or not self.target_size:
+            return None
+        if self.prerenderer:
+            self.prerenderer.cancel()
         
-        # Nếu không có target_size, trả về slide gốc
-        return original_pixmap
+        # Bắt đầu từ slide hiện tại để người trình bày có thể điều hướng ngay
+        total = self.get_total_slides()
+        order = [(self.current_slide + i) % total for i in range(total)]
+        jobs = []
+        for page_num in order:
+            scale = self._scale_for(page_num)
+            if (page_num, scale) in self.cache:
+                continue
+            if self.disk_cache and self.disk_cache.contains(self.disk_cache_key, page_num, scale):
+                continue  # Đọc từ cache đĩa khi cần, nhanh hơn render lại
+            jobs.append((page_num, scale))
         
-    def _fit_slide_to_size(self, pixmap, target_size):
-        """Fit slide vào kích thước target với tỷ lệ khung hình"""
-        if not pixmap or not target_size:
-            return pixmap
+        self.prerenderer = ParallelPrerenderer(self.render_path, jobs, self._prerendered_page, workers)
+        self.prerenderer.start()
+        return self.prerenderer
+        
+    def _prerendered_page(self, page_num, scale, image):
+        """Nhận trang đã render từ process con"""
+        self.cache.put((page_num, scale), image)
+        if self.disk_cache:
+            self.disk_cache.put(self.disk_cache_key, page_num, scale, image)
+        
+    def _render_pdf_page(self, page_num, scale, clip=None):
+        """Render một trang PDF (hoặc vùng clip, đơn vị trang) thành QImage"""
+        try:
+            with self._render_lock:
+                page = self.doc.load_page(page_num)
+                
+                # Render page đúng bằng kích thước hiển thị
+                mat = fitz.Matrix(scale, scale)
+                if clip:
+                    # Tọa độ clip tính từ góc trên bên trái của trang
+                    x, y = page.rect.x0, page.rect.y0
+                    clip = fitz.Rect(x + clip.left(), y + clip.top(), x + clip.right(), y + clip.bottom())
+                pix = page.get_pixmap(matrix=mat, clip=clip, alpha=False)
+                
+            # Chuyển đổi trực tiếp sang QImage
+            return self._fitz_pixmap_to_qimage(pix)
+            
+        except Exception as e:
+            raise Exception(f"Lỗi khi render trang {page_num + 1}: {str(e)}")
             
-        slide_width = pixmap.width()
-        slide_height = pixmap.height()
-        target_width = target_size.width()
-        target_height = target_size.height()
+    @staticmethod
+    def _fitz_pixmap_to_qimage(pix):
+        """Chuyển đổi fitz.Pixmap sang QImage không qua PIL/PNG"""
+        if pix.alpha:
+            source_format = QImage.Format.Format_RGBA8888
+            target_format = QImage.Format.Format_ARGB32_Premultiplied
+        else:
+            source_format = QImage.Format.Format_RGB888
+            target_format = QImage.Format.Format_RGB32
         
-        # Tính tỷ lệ để fit width hoặc height
-        width_ratio = target_width / slide_width
-        height_ratio = target_height / slide_height
+        # Bọc trực tiếp buffer của pixmap (đúng stride), rồi copy một lần
+        # sang định dạng gốc của QPixmap để QImage không phụ thuộc vào bộ nhớ
+        # của fitz.Pixmap và QPixmap.fromImage không phải chuyển đổi lại
+        image = QImage(pix.samples_mv, pix.width, pix.height, pix.stride, source_format)
+        return image.convertToFormat(target_format)
         
-        # Chọn tỷ lệ nhỏ hơn để fit toàn bộ slide
-        scale_factor = min(width_ratio, height_ratio)
+    def get_current_slide(self, target_size=None, device_pixel_ratio=1.0):
+        """Lấy slide hiện tại, render đúng kích thước hiển thị (đã tính zoom)"""
+        if not (0 <= self.current_slide < self.get_total_slides()):
+            return None
         
-        # Áp dụng zoom factor
-        final_scale = scale_factor * self.zoom_factor
+        if target_size:
+            image = self.prepare_current_slide(target_size, device_pixel_ratio)
+        else:
+            image = self._get_slide_image(self.current_slide, self._scale_for(self.current_slide))
+        pixmap = QPixmap.fromImage(image)
+        if target_size:
+            pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return pixmap
         
-        # Giới hạn zoom
-        final_scale = max(self.min_zoom, min(self.max_zoom, final_scale))
+    def prepare_current_slide(self, target_size, device_pixel_ratio=1.0):
+        """Render slide hiện tại vào cache (gọi được từ worker thread)"""
+        self._set_view(target_size, device_pixel_ratio)
         
-        # Tính kích thước cuối cùng
-        final_width = int(slide_width * final_scale)
-        final_height = int(slide_height * final_scale)
+        # Render một lần ở đúng scale, không cần scale lại pixmap
+        return self._get_slide_image(self.current_slide, self._scale_for(self.current_slide))
         
-        # Scale pixmap
-        return pixmap.scaled(final_width, final_height, 
-                           Qt.AspectRatioMode.KeepAspectRatio, 
-                           Qt.TransformationMode.SmoothTransformation)
+    def get_current_view(self, target_size, device_pixel_ratio=1.0, pan_offset=QPoint(0, 0)):
+        """Lấy phần slide hiện tại cần hiển thị: cả trang, hoặc chỉ các tile nhìn thấy khi zoom lớn"""
+        # Trả về ([(QPixmap, vị trí trong slide)], kích thước cả slide) theo pixel logic
+        if not (0 <= self.current_slide < self.get_total_slides()):
+            return None
+        self._set_view(target_size, device_pixel_ratio)
+        page_num = self.current_slide
+        scale = self._scale_for(page_num)
+        page_width, page_height = self.page_sizes[page_num]
+        
+        if self._uses_region(page_num, scale):
+            # Không rasterize cả trang ở zoom lớn, chỉ các tile đang nhìn thấy
+            tiles = self._get_visible_tiles(page_num, scale, pan_offset)
+            full_width, full_height = round(page_width * scale), round(page_height * scale)
+        else:
+            image = self._get_slide_image(page_num, scale)
+            tiles = [(image, (0, 0, image.width(), image.height()))]
+            full_width, full_height = image.width(), image.height()
+        
+        # Kích thước slide theo đúng số pixel của ảnh đã render: vẽ 1:1, không co giãn
+        result = []
+        for image, (x0, y0, x1, y1) in tiles:
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(device_pixel_ratio)
+            result.append((pixmap, QRectF(x0 / device_pixel_ratio, y0 / device_pixel_ratio,
+                                          (x1 - x0) / device_pixel_ratio, (y1 - y0) / device_pixel_ratio)))
+        slide_size = QSizeF(full_width / device_pixel_ratio, full_height / device_pixel_ratio)
+        return result, slide_size
+        
+    def _set_view(self, target_size, device_pixel_ratio):
+        """Cập nhật kích thước hiển thị, lên lịch render trước lại nếu thay đổi"""
+        view_changed = (target_size != self.target_size or
+                        device_pixel_ratio != self.device_pixel_ratio)
+        self.target_size = QSize(target_size)
+        self.device_pixel_ratio = device_pixel_ratio
+        if view_changed:
+            self._view_changed()
         
     def zoom_in(self, factor=1.2):
         """Zoom in slide"""
         self.zoom_factor = min(self.max_zoom, self.zoom_factor * factor)
+        self._view_changed()
         
     def zoom_out(self, factor=1.2):
         """Zoom out slide"""
         self.zoom_factor = max(self.min_zoom, self.zoom_factor / factor)
+        self._view_changed()
         
     def reset_zoom(self):
         """Reset zoom về mặc định"""
         self.zoom_factor = 1.0
+        self._view_changed()
         
     def get_zoom_factor(self):
         """Lấy zoom factor hiện tại"""
@@ -176,32 +406,63 @@ class PresentationViewer:
         
     def get_total_slides(self):
         """Lấy tổng số slide"""
-        return len(self.slides)
+        return len(self.page_sizes)
         
     def next_slide(self):
         """Chuyển đến slide tiếp theo"""
-        if self.current_slide < len(self.slides) - 1:
+        if self.current_slide < self.get_total_slides() - 1:
             self.current_slide += 1
+            self._slide_changed()
             
     def previous_slide(self):
         """Chuyển đến slide trước đó"""
         if self.current_slide > 0:
             self.current_slide -= 1
+            self._slide_changed()
             
     def go_to_slide(self, slide_number):
         """Chuyển đến slide cụ thể"""
-        if 0 <= slide_number < len(self.slides):
+        if 0 <= slide_number < self.get_total_slides() and slide_number != self.current_slide:
             self.current_slide = slide_number
+            self._slide_changed()
+            
+    def _slide_changed(self):
+        """Báo cho prefetcher biết slide hiện tại đã thay đổi"""
+        if self.prefetcher:
+            self.prefetcher.slide_changed(self.current_slide)
             
+    def _view_changed(self):
+        """Kích thước hiển thị hoặc zoom thay đổi: render trước lại ở scale mới"""
+        if self.prefetcher:
+            self.prefetcher.refresh()
+            
+    def get_cache_stats(self):
+        """Lấy thống kê của cache slide"""
+        return self.cache.get_stats()
+        
     def get_slide_info(self):
         """Lấy thông tin về slide hiện tại"""
-        if self.slides:
-            current_pixmap = self.slides[self.current_slide]
+        if self.page_sizes:
+            page_width, page_height = self.page_sizes[self.current_slide]
             return {
                 'current_slide': self.current_slide + 1,
-                'total_slides': len(self.slides),
-                'width': current_pixmap.width(),
-                'height': current_pixmap.height(),
+                'total_slides': self.get_total_slides(),
+                'width': page_width,
+                'height': page_height,
                 'zoom_factor': self.zoom_factor
             }
-        return None 
\ No newline at end of file
+        return None
+        
+    def close(self):
+        """Đóng tài liệu đang mở"""
+        if self.prerenderer:
+            self.prerenderer.cancel(wait=True)
+            self.prerenderer = None
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+            self.prefetcher = None
+        with self._render_lock:
+            if self.doc is not None:
+                self.doc.close()
+                self.doc = None
+        self.cache.clear()
\ No newline at end of file
@@ -4,27 +4,96 @@
 import cv2
 import numpy as np
 import os
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from collections import deque
 from datetime import datetime
-from PyQt6.QtCore import QThread, pyqtSignal, QTimer
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QEvent, QPoint, QRect
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog, QMessageBox
 from PyQt6.QtGui import QPixmap, QPainter, QPen, QColor
 
+from frame_recorder import FrameRecorder, PyAVEncoder
+
+def even_region(x, y, width, height):
+    """Vùng ghi có kích thước chẵn (libx264/yuv420p yêu cầu)"""
+    return (x, y, max(2, width - width % 2), max(2, height - height % 2))
+
 class ScreenRecorder(QWidget):
-    def __init__(self):
+    def __init__(self, target_widget=None, frame_source=None):
         super().__init__()
         self.setWindowTitle("Ghi màn hình")
         self.setGeometry(100, 100, 400, 200)
         
         # Biến ghi màn hình
-        self.is_recording = False
+        self.recording = False
         self.recording_thread = None
+        self.target_widget = target_widget  # Chỉ ghi vùng của widget này (None: cả màn hình)
+        self.frame_source = frame_source  # Hàm trả về frame đang hiển thị; có thì ghi frame thay vì chụp X11
+        self.watched_widgets = [target_widget] if target_widget is not None else []
         self.output_file = None
         self.fps = 30
         self.quality = 80
+        self.max_duration = None  # Thời lượng ghi tối đa (giây), None: ghi đến khi dừng
+        
+        # Theo dõi di chuyển/đổi kích thước cửa sổ để cập nhật vùng ghi
+        self.region_timer = QTimer(self)
+        self.region_timer.setSingleShot(True)
+        self.region_timer.setInterval(300)  # Chờ cửa sổ ngừng di chuyển
+        self.region_timer.timeout.connect(self.update_region)
+        if target_widget is not None:
+            target_widget.installEventFilter(self)
+            target_widget.window().installEventFilter(self)
         
         # Thiết lập giao diện
         self.init_ui()
         
+    def watch_widget(self, widget):
+        """Thêm widget mà nội dung nằm trong frame ghi (ví dụ overlay vẽ)"""
+        if widget not in self.watched_widgets:
+            self.watched_widgets.append(widget)
+            if isinstance(self.recording_thread, FrameRecorder):
+                self.recording_thread.watch(widget)
+        
+    def mark_damaged(self):
+        """Báo nội dung trình chiếu đã thay đổi (chế độ ghi frame)"""
+        if isinstance(self.recording_thread, FrameRecorder):
+            self.recording_thread.mark_damaged()
+            
+    def capture_region(self):
+        """Vùng màn hình của target widget (x, y, rộng, cao) theo pixel vật lý, None nếu ghi cả màn hình"""
+        widget = self.target_widget
+        if widget is None or not widget.isVisible():
+            return None
+        
+        # Chỉ phần widget nằm trong màn hình (x11grab lỗi nếu vùng ghi vượt ra ngoài)
+        rect = QRect(widget.mapToGlobal(QPoint(0, 0)), widget.size())
+        screen = widget.screen()
+        if screen is not None:
+            rect = rect.intersected(screen.geometry())
+        if rect.isEmpty():
+            return None
+        
+        ratio = widget.devicePixelRatioF()
+        return even_region(round(rect.x() * ratio), round(rect.y() * ratio),
+                           round(rect.width() * ratio), round(rect.height() * ratio))
+        
+    def eventFilter(self, obj, event):
+        """Cửa sổ di chuyển, đổi kích thước hoặc bật/tắt toàn màn hình: cập nhật vùng ghi"""
+        if event.type() in (QEvent.Type.Move, QEvent.Type.Resize, QEvent.Type.WindowStateChange):
+            if self.is_recording():
+                self.region_timer.start()
+        return super().eventFilter(obj, event)
+        
+    def update_region(self):
+        """Báo vùng ghi mới cho thread ghi (ghi tiếp sang đoạn mới nếu vùng thay đổi)"""
+        if isinstance(self.recording_thread, RecordingThread) and self.is_recording():
+            region = self.capture_region()
+            if region is not None:
+                self.recording_thread.set_region(region)
+        
     def init_ui(self):
         layout = QVBoxLayout(self)
         
@@ -138,7 +207,7 @@ class ScreenRecorder(QWidget):
         
     def toggle_recording(self):
         """Bật/tắt ghi màn hình"""
-        if not self.is_recording:
+        if not self.is_recording():
             self.start_recording()
         else:
             self.stop_recording()
@@ -157,8 +226,16 @@ class ScreenRecorder(QWidget):
                 
             self.output_file = os.path.join(output_dir, self.output_file)
             
-            # Bắt đầu thread ghi màn hình
-            self.recording_thread = RecordingThread(self.output_file, self.fps, self.quality)
+            if self.frame_source is not None:
+                # Ghi trực tiếp frame đang hiển thị (chạy được cả khi không có X11)
+                self.recording_thread = FrameRecorder(self.output_file, self.frame_source, self.fps, parent=self)
+                for widget in self.watched_widgets:
+                    self.recording_thread.watch(widget)
+            else:
+                # Bắt đầu thread ghi màn hình
+                self.recording_thread = RecordingThread(self.output_file, self.fps, self.quality,
+                                                        self.capture_region(),
+                                                        max_duration=self.max_duration)
             self.recording_thread.recording_started.connect(self.on_recording_started)
             self.recording_thread.recording_stopped.connect(self.on_recording_stopped)
             self.recording_thread.error_occurred.connect(self.on_recording_error)
@@ -175,7 +252,7 @@ class ScreenRecorder(QWidget):
             
     def on_recording_started(self):
         """Xử lý khi bắt đầu ghi"""
-        self.is_recording = True
+        self.recording = True
         self.record_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.status_label.setText("Đang ghi màn hình...")
@@ -193,7 +270,8 @@ class ScreenRecorder(QWidget):
         
     def on_recording_stopped(self):
         """Xử lý khi dừng ghi"""
-        self.is_recording = False
+        self.recording = False
+        self.region_timer.stop()
         self.record_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.status_label.setText("Đã dừng ghi màn hình")
@@ -241,33 +319,168 @@ class ScreenRecorder(QWidget):
             QMessageBox.information(self, "Thông tin", "Chưa có thư mục recordings nào.")
             
     def is_recording(self):
-        """Kiểm tra trạng thái ghi"""
-        return self.is_recording
+        """Kiểm tra trạng thái ghi (kể cả khi thread vừa khởi động)"""
+        return self.recording or bool(self.recording_thread and self.recording_thread.isRunning())
         
     def closeEvent(self, event):
         """Xử lý khi đóng cửa sổ"""
-        if self.is_recording:
+        if self.is_recording():
             self.stop_recording()
         event.accept()
 
 
+class FrameRing:
+    """Ring buffer các frame numpy cấp phát sẵn giữa thread chụp và thread encode"""
+    def __init__(self, shape, capacity=8):
+        self.frames = [np.empty(shape, np.uint8) for _ in range(capacity)]
+        self.timestamps = [0.0] * capacity  # Thời điểm chụp (giây từ lúc bắt đầu ghi)
+        self._free = deque(range(capacity))
+        self._ready = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        
+    def acquire(self):
+        """Lấy một ô trống để ghi frame, None nếu encoder chưa kịp giải phóng ô nào"""
+        with self._cond:
+            return self._free.popleft() if self._free else None
+            
+    def publish(self, index, timestamp):
+        """Đưa frame đã chụp cho encoder"""
+        with self._cond:
+            self.timestamps[index] = timestamp
+            self._ready.append(index)
+            self._cond.notify()
+            
+    def take(self):
+        """Chờ frame tiếp theo; None khi đã đóng và không còn frame"""
+        with self._cond:
+            while not self._ready and not self._closed:
+                self._cond.wait()
+            return self._ready.popleft() if self._ready else None
+            
+    def release(self, index):
+        """Trả ô cho thread chụp sau khi encode xong"""
+        with self._cond:
+            self._free.append(index)
+            
+    def close(self):
+        """Không chụp thêm; encoder ghi nốt các frame còn lại rồi dừng"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            
+def store_screenshot(screenshot, slot):
+    """Chép ảnh mss vào ô cấp phát sẵn (scale giữ tỷ lệ nếu khác kích thước), không tạo mảng tạm cỡ frame"""
+    # Bọc trực tiếp buffer BGRA của mss thay vì np.array (copy)
+    frame = np.frombuffer(screenshot.raw, np.uint8).reshape(screenshot.height, screenshot.width, 4)
+    if frame.shape == slot.shape:
+        np.copyto(slot, frame)
+        return
+    
+    # Vùng ghi đổi kích thước: scale giữ tỷ lệ vào giữa ô và thêm viền đen, như khi ghép đoạn
+    height, width = slot.shape[:2]
+    scale = min(width / screenshot.width, height / screenshot.height)
+    w = min(width, max(1, round(screenshot.width * scale)))
+    h = min(height, max(1, round(screenshot.height * scale)))
+    x, y = (width - w) // 2, (height - h) // 2
+    slot[:y] = 0
+    slot[y + h:] = 0
+    slot[y:y + h, :x] = 0
+    slot[y:y + h, x + w:] = 0
+    cv2.resize(frame, (w, h), dst=slot[y:y + h, x:x + w], interpolation=cv2.INTER_AREA)
+        
+class CfrWriter:
+    """Ghi CFR bằng cv2, lặp frame trước để bù các nhịp bị lỡ; chuyển BGRA -> BGR vào buffer dùng lại"""
+    def __init__(self, output_file, fps, size):
+        self.fps = fps
+        self.out = cv2.VideoWriter(output_file, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+        if not self.out.isOpened():
+            raise Exception(f"cv2 không mở được file {output_file}")
+        self.bgr = np.empty((size[1], size[0], 3), np.uint8)  # Frame đã ghi gần nhất
+        self.written = 0
+        self.duplicated = 0
+        
+    def write(self, frame, timestamp):
+        # Các nhịp bị lỡ được bù bằng frame trước để thời lượng video đúng
+        self._repeat_until(timestamp)
+        cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=self.bgr)
+        self.out.write(self.bgr)
+        self.written += 1
+        
+    def finish(self, timestamp):
+        """Lặp frame cuối đến thời điểm dừng ghi"""
+        self._repeat_until(timestamp)
+        
+    def _repeat_until(self, timestamp):
+        expected = int(timestamp * self.fps)
+        while self.written and self.written < expected:
+            self.out.write(self.bgr)
+            self.written += 1
+            self.duplicated += 1
+            
+    def close(self):
+        self.out.release()
+        
+class VfrWriter:
+    """Ghi VFR bằng PyAV: chỉ encode frame khác frame trước, cộng frame giữ nhịp"""
+    duplicated = 0  # VFR không cần lặp frame
+    
+    def __init__(self, output_file, size, keepalive_interval):
+        self.encoder = PyAVEncoder(output_file, size[0], size[1])  # ImportError nếu chưa cài PyAV
+        self.keepalive_interval = keepalive_interval
+        self.previous = np.empty((size[1], size[0], 4), np.uint8)  # Frame đã encode gần nhất
+        self.last_write_time = None
+        
+    def write(self, frame, timestamp):
+        # cv2.norm so sánh không cần mảng tạm như np.array_equal
+        if (self.last_write_time is None or timestamp - self.last_write_time >= self.keepalive_interval
+                or cv2.norm(frame, self.previous, cv2.NORM_INF) != 0):
+            self.encoder.write(frame, timestamp)  # BGRA đưa thẳng vào encoder
+            np.copyto(self.previous, frame)
+            self.last_write_time = timestamp
+            
+    def finish(self, timestamp):
+        """Encode lại frame cuối tại thời điểm dừng để video kéo dài đến lúc dừng ghi"""
+        if self.last_write_time is not None and timestamp > self.last_write_time:
+            self.encoder.write(self.previous, timestamp)
+            self.last_write_time = timestamp
+            
+    def close(self):
+        self.encoder.close()
+        
 class RecordingThread(QThread):
     """Thread riêng biệt để ghi màn hình"""
     recording_started = pyqtSignal()
     recording_stopped = pyqtSignal()
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, output_file, fps=30, quality=80):
+    def __init__(self, output_file, fps=30, quality=80, region=None, keepalive_interval=2.0,
+                 max_duration=None):
         super().__init__()
         self.output_file = output_file
         self.fps = fps
         self.quality = quality
+        self.region = region  # (x, y, rộng, cao) cần ghi; None: cả màn hình
+        self.keepalive_interval = keepalive_interval  # Giữ ít nhất một frame mỗi N giây khi màn hình đứng yên
+        self.max_duration = max_duration  # Tự dừng sau N giây, None: ghi đến khi dừng
         self.is_recording = False
+        self.start_time = None
+        self.stop_time = None  # Giây tính từ start_time lúc vòng chụp mss kết thúc
+        
+        # Thống kê của chế độ chụp bằng mss
+        self.frames_captured = 0
+        self.frames_dropped = 0  # Chụp được nhưng encoder chưa kịp xử lý, hoặc lỡ nhịp chụp
+        self.frames_duplicated = 0  # Frame lặp lại để video CFR đúng thời lượng
+        
+    def set_region(self, region):
+        """Đổi vùng ghi (gọi từ GUI thread); ffmpeg sẽ ghi tiếp sang đoạn mới"""
+        self.region = region
         
     def run(self):
         """Chạy thread ghi màn hình"""
         try:
             self.is_recording = True
+            self.start_time = time.monotonic()
             self.recording_started.emit()
             
             # Sử dụng ffmpeg để ghi màn hình (cần cài đặt ffmpeg)
@@ -279,83 +492,233 @@ class RecordingThread(QThread):
             self.is_recording = False
             self.recording_stopped.emit()
             
+    def _time_up(self):
+        """Đã ghi đủ thời lượng tối đa"""
+        return self.max_duration is not None and time.monotonic() - self.start_time >= self.max_duration
+        
+    def _ffmpeg_command(self, region, output_file):
+        """Lệnh ffmpeg ghi một vùng màn hình X11"""
+        display = os.environ.get('DISPLAY', ':0.0')
+        cmd = ['ffmpeg', '-loglevel', 'error', '-nostats',
+               '-f', 'x11grab',  # Linux X11
+               '-framerate', str(self.fps)]
+        if region is not None:
+            # Chỉ ghi vùng trình chiếu: ít pixel hơn nên nhẹ CPU và file nhỏ hơn
+            x, y, width, height = region
+            cmd += ['-video_size', f'{width}x{height}', '-i', f'{display}+{x},{y}']
+        else:
+            cmd += ['-i', display]
+        cmd += [
+            '-f', 'alsa',  # Audio
+            '-i', 'default',  # Audio device
+            # Bỏ các frame giống frame trước (slide tĩnh) trước khi encode, ghi VFR;
+            # max giới hạn số frame bỏ liên tiếp để vẫn có frame giữ nhịp
+            '-vf', f'mpdecimate=max={max(1, round(self.fps * self.keepalive_interval))}',
+            '-vsync', 'vfr',
+            '-c:v', 'libx264',  # Video codec
+            '-preset', 'ultrafast',  # Preset
+            '-crf', str(23),  # Chất lượng video
+            '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac',  # Audio codec
+            '-b:a', '128k',  # Audio bitrate
+            '-y',  # Ghi đè file
+            output_file
+        ]
+        return cmd
+        
     def _record_with_ffmpeg(self):
-        """Ghi màn hình sử dụng ffmpeg"""
+        """Ghi màn hình sử dụng ffmpeg; mỗi lần vùng ghi thay đổi ghi sang một đoạn mới"""
+        output_dir = os.path.dirname(self.output_file) or '.'
+        segment_dir = tempfile.mkdtemp(prefix='.segments_', dir=output_dir)
+        log_path = os.path.join(segment_dir, 'ffmpeg.log')
+        segments = []  # [(đường dẫn, vùng ghi)]
         try:
-            import subprocess
-            
-            # Lệnh ffmpeg để ghi màn hình
-            cmd = [
-                'ffmpeg',
-                '-f', 'x11grab',  # Linux X11
-                '-s', '1920x1080',  # Độ phân giải
-                '-i', ':0.0',  # Display
-                '-f', 'alsa',  # Audio
-                '-i', 'default',  # Audio device
-                '-c:v', 'libx264',  # Video codec
-                '-preset', 'ultrafast',  # Preset
-                '-crf', str(23),  # Chất lượng video
-                '-c:a', 'aac',  # Audio codec
-                '-b:a', '128k',  # Audio bitrate
-                '-y',  # Ghi đè file
-                self.output_file
-            ]
-            
-            # Chạy ffmpeg
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            with open(log_path, 'wb') as log:
+                while self.is_recording:
+                    region = self.region
+                    path = os.path.join(segment_dir, f'segment_{len(segments):03d}.mp4')
+                    process = subprocess.Popen(self._ffmpeg_command(region, path),
+                                               stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                               stderr=log)
+                    segments.append((path, region))
+                    
+                    # Chờ cho đến khi dừng hoặc cửa sổ đổi vị trí/kích thước
+                    while self.is_recording and self.region == region:
+                        if process.poll() is not None:
+                            break
+                        if self._time_up():
+                            self.is_recording = False
+                            break
+                        self.msleep(100)  # Sleep 100ms
+                        
+                    if process.poll() is not None:
+                        raise Exception(f"ffmpeg dừng bất thường: {self._log_tail(log_path)}")
+                    self._stop_ffmpeg(process)
+                    
+            self._join_segments(segments)
             
-            # Chờ cho đến khi dừng
-            while self.is_recording:
-                if process.poll() is not None:
-                    break
-                self.msleep(100)  # Sleep 100ms
-                
-            # Dừng process
-            if process.poll() is None:
-                process.terminate()
-                process.wait()
-                
         except FileNotFoundError:
             # Nếu không có ffmpeg, sử dụng phương pháp thay thế
             self._record_with_python()
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+            
+    @staticmethod
+    def _stop_ffmpeg(process):
+        """Dừng ffmpeg bằng phím 'q' để file mp4 được ghi đầy đủ"""
+        try:
+            process.communicate(b'q', timeout=10)
+        except (subprocess.TimeoutExpired, BrokenPipeError, OSError):
+            process.terminate()
+            process.wait()
+            
+    @staticmethod
+    def _log_tail(log_path, size=500):
+        """Phần cuối log của ffmpeg để báo lỗi"""
+        try:
+            with open(log_path, 'rb') as f:
+                return f.read()[-size:].decode('utf-8', 'replace').strip()
+        except OSError:
+            return ''
+            
+    def _join_segments(self, segments):
+        """Ghép các đoạn thành file output, đưa về cùng kích thước với đoạn đầu tiên có vùng ghi"""
+        segments = [(path, region) for path, region in segments
+                    if os.path.exists(path) and os.path.getsize(path) > 0]
+        if not segments:
+            return
+        if len(segments) == 1:
+            os.replace(segments[0][0], self.output_file)
+            return
+        
+        segment_dir = os.path.dirname(segments[0][0])
+        sizes = {region[2:] if region else None for _, region in segments}
+        if len(sizes) == 1:
+            # Chỉ di chuyển cửa sổ: các đoạn cùng kích thước, ghép không cần encode lại
+            list_path = os.path.join(segment_dir, 'segments.txt')
+            with open(list_path, 'w') as f:
+                for path, _ in segments:
+                    f.write(f"file '{os.path.basename(path)}'\n")
+            cmd = ['ffmpeg', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                   '-i', list_path, '-c', 'copy', '-y', self.output_file]
+        else:
+            # Bật/tắt toàn màn hình: scale giữ tỷ lệ và thêm viền về kích thước của đoạn đầu;
+            # đoạn ghi cả màn hình (vùng None, ví dụ lúc bắt đầu cửa sổ chưa hiện) không dùng làm mốc
+            width, height = next(region[2:] for _, region in segments if region)
+            cmd = ['ffmpeg', '-loglevel', 'error']
+            filters = []
+            streams = ''
+            for i, (path, _) in enumerate(segments):
+                cmd += ['-i', path]
+                filters.append(f'[{i}:v]scale={width}:{height}:force_original_aspect_ratio=decrease:force_divisible_by=2,'
+                               f'pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1[v{i}]')
+                streams += f'[v{i}][{i}:a]'
+            filters.append(f'{streams}concat=n={len(segments)}:v=1:a=1[v][a]')
+            cmd += ['-filter_complex', ';'.join(filters), '-map', '[v]', '-map', '[a]',
+                    '-vsync', 'vfr', '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', str(23),
+                    '-pix_fmt', 'yuv420p', '-c:a', 'aac', '-b:a', '128k',
+                    '-y', self.output_file]
+        
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise Exception(f"Không ghép được các đoạn video: "
+                            f"{result.stderr.decode('utf-8', 'replace').strip()[-500:]}")
             
     def _record_with_python(self):
-        """Ghi màn hình sử dụng Python (fallback)"""
+        """Ghi màn hình sử dụng Python (fallback): thread này chụp, một thread khác encode"""
         try:
             # Sử dụng mss để chụp màn hình
             import mss
-            
-            with mss.mss() as sct:
-                # Chụp màn hình chính
+        except ImportError:
+            self.error_occurred.emit("Cần cài đặt ffmpeg hoặc mss để ghi màn hình")
+            return
+        
+        with mss.mss() as sct:
+            # Vùng trình chiếu, hoặc màn hình chính nếu không có
+            region = self.region
+            if region is not None:
+                monitor = self._monitor(region)
+            else:
                 monitor = sct.monitors[1]  # Màn hình chính
-                
-                # Tạo video writer
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                out = cv2.VideoWriter(self.output_file, fourcc, self.fps, 
-                                    (monitor['width'], monitor['height']))
-                
-                frame_count = 0
-                max_frames = self.fps * 60  # Ghi tối đa 1 phút
-                
-                while self.is_recording and frame_count < max_frames:
+            size = (monitor['width'], monitor['height'])
+            
+            ring = FrameRing((size[1], size[0], 4))
+            encoder_thread = threading.Thread(target=self._encode_frames, args=(ring, size),
+                                              name="mss-encoder", daemon=True)
+            encoder_thread.start()
+            try:
+                interval = 1.0 / self.fps
+                next_tick = time.monotonic()
+                while self.is_recording and not self._time_up():
+                    # Nhịp chụp theo đồng hồ monotonic, không cộng dồn thời gian chụp/encode
+                    delay = next_tick - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    now = time.monotonic()
+                    missed = int((now - next_tick) / interval)
+                    if missed:
+                        self.frames_dropped += missed  # Chụp chậm hơn FPS: lỡ nhịp
+                    next_tick += (missed + 1) * interval
+                    
+                    # Cửa sổ di chuyển/đổi kích thước: chụp theo vùng mới
+                    if self.region is not None and self.region != region:
+                        region = self.region
+                        monitor = self._monitor(region)
+                        
                     # Chụp màn hình
                     screenshot = sct.grab(monitor)
+                    self.frames_captured += 1
+                    index = ring.acquire()
+                    if index is None:
+                        self.frames_dropped += 1  # Encoder chậm: bỏ frame thay vì chờ
+                        continue
                     
-                    # Chuyển đổi sang numpy array
-                    frame = np.array(screenshot)
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-                    
-                    # Ghi frame
-                    out.write(frame)
-                    
-                    frame_count += 1
-                    self.msleep(1000 // self.fps)  # Sleep theo FPS
-                    
-                out.release()
+                    # Chép vào ô cấp phát sẵn, video giữ kích thước ban đầu
+                    store_screenshot(screenshot, ring.frames[index])
+                    ring.publish(index, now - self.start_time)
+            finally:
+                self.stop_time = time.monotonic() - self.start_time
+                ring.close()
+                encoder_thread.join()
                 
-        except ImportError:
-            self.error_occurred.emit("Cần cài đặt ffmpeg hoặc mss để ghi màn hình")
+        print(f"Ghi màn hình: {self.frames_captured} frame chụp, {self.frames_dropped} bị bỏ, "
+              f"{self.frames_duplicated} lặp lại")
+        
+    def _encode_frames(self, ring, size):
+        """Thread encode: VFR bằng PyAV nếu có, không thì cv2 CFR (lặp frame để đúng thời lượng)"""
+        try:
+            try:
+                writer = VfrWriter(self.output_file, size, self.keepalive_interval)
+            except ImportError:
+                writer = CfrWriter(self.output_file, self.fps, size)
+        except Exception as e:
+            # Không mở được file/encoder: báo lỗi và dừng cả thread chụp
+            self.error_occurred.emit(f"Không mở được encoder: {e}")
+            self.is_recording = False
+            return
+            
+        try:
+            while True:
+                index = ring.take()
+                if index is None:
+                    break
+                writer.write(ring.frames[index], ring.timestamps[index])
+                ring.release(index)
+            # Màn hình đứng yên ở cuối: giữ frame cuối đến lúc dừng thay vì cắt video sớm
+            writer.finish(self.stop_time)
+        except Exception as e:
+            self.error_occurred.emit(f"Lỗi khi encode video: {e}")
+            self.is_recording = False
+        finally:
+            writer.close()
+            self.frames_duplicated = writer.duplicated
             
+    @staticmethod
+    def _monitor(region):
+        """Vùng ghi theo định dạng của mss"""
+        x, y, width, height = region
+        return {'left': x, 'top': y, 'width': width, 'height': height}
+        
     def stop_recording(self):
         """Dừng ghi màn hình"""
         self.is_recording = False 
\ No newline at end of file
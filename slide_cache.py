@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+
+class SlideCache:
+    """Cache LRU cho ảnh slide đã render, giới hạn theo dung lượng bộ nhớ"""
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (ảnh, số byte)
+        self._lock = threading.Lock()  # Cache được dùng chung với các worker thread
+        
+        # Thống kê để tinh chỉnh dung lượng cache
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resident_bytes = 0
+        
+    @staticmethod
+    def _image_bytes(image):
+        """Ước lượng số byte bộ nhớ của QPixmap/QImage"""
+        return image.width() * image.height() * max(image.depth(), 8) // 8
+        
+    def get(self, key):
+        """Lấy ảnh theo key, trả về None nếu chưa có trong cache"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+            
+    def put(self, key, image):
+        """Thêm ảnh vào cache, loại bỏ ảnh ít dùng nhất khi vượt dung lượng"""
+        if image is None:
+            return
+        
+        nbytes = self._image_bytes(image)
+        with self._lock:
+            if key in self._entries:
+                self.resident_bytes -= self._entries.pop(key)[1]
+            
+            # Ảnh lớn hơn toàn bộ dung lượng cache thì không giữ lại
+            if nbytes > self.max_bytes:
+                return
+            
+            self._entries[key] = (image, nbytes)
+            self.resident_bytes += nbytes
+            
+            while self.resident_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.resident_bytes -= evicted_bytes
+                self.evictions += 1
+            
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+            
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+            
+    def clear(self):
+        """Xóa toàn bộ ảnh trong cache"""
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+            
+    def get_stats(self):
+        """Lấy thống kê hit/miss/eviction và dung lượng đang dùng"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'resident_bytes': self.resident_bytes,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtGui import QPainter
+from PyQt6.QtCore import QPoint, QPointF, QRectF
+
+class SlideCanvas(QLabel):
+    """Khu vực trình chiếu: giữ các tile slide đã render, pan chỉ là dịch vị trí khi vẽ"""
+    def __init__(self, text="", parent=None):
+        super().__init__(text, parent)
+        self.tiles = []  # [(QPixmap, vị trí trong cả slide)] đã render đúng kích thước hiển thị
+        self.region = QRectF()  # Vùng slide đã có tile (pixel logic)
+        self.slide_size = None  # Kích thước cả slide lúc render (pixel logic)
+        self.preview_scale = 1.0  # Phóng to tạm thời trong lúc chờ render lại khi zoom
+        self.pan_offset = QPoint(0, 0)
+        
+    def set_tiles(self, tiles, slide_size):
+        """Thay các tile của slide (chỉ khi slide/zoom/kích thước/vùng nhìn thấy thay đổi)"""
+        self.tiles = tiles
+        self.slide_size = slide_size
+        self.preview_scale = 1.0
+        self.region = QRectF()
+        for _, rect in tiles:
+            self.region = self.region.united(rect)
+        if self.text():
+            self.setText("")
+        self.update()
+        
+    def set_preview_scale(self, scale):
+        """Phóng to nhanh ảnh đang có (không làm mượt) cho đến khi có bản render nét"""
+        if scale != self.preview_scale:
+            self.preview_scale = scale
+            self.update()
+        
+    def set_pan_offset(self, offset):
+        """Dịch slide theo pan, không render lại"""
+        if offset == self.pan_offset:
+            return
+        self.pan_offset = QPoint(offset)
+        self.update()
+        
+    def slide_rect_origin(self):
+        """Góc trên bên trái của slide trong widget (đã tính pan)"""
+        size = self.slide_size * self.preview_scale
+        x = (self.width() - int(size.width())) // 2 + self.pan_offset.x()
+        y = (self.height() - int(size.height())) // 2 + self.pan_offset.y()
+        return QPoint(x, y)
+        
+    def slide_rect(self):
+        """Vị trí và kích thước slide trong widget (chưa tính pan, đã tính zoom xem trước)"""
+        if self.slide_size is None:
+            return None
+        return QRectF(QPointF(self.slide_rect_origin() - self.pan_offset), self.slide_size * self.preview_scale)
+        
+    def _target_rect(self, rect):
+        """Vị trí trong widget của một vùng slide (đã tính pan và zoom xem trước)"""
+        scale = self.preview_scale
+        return QRectF(QPointF(self.slide_rect_origin()) + rect.topLeft() * scale, rect.size() * scale)
+        
+    def covers_view(self):
+        """Phần slide đang nhìn thấy có nằm trọn trong vùng đã render không"""
+        if self.slide_size is None:
+            return True
+        slide_rect = QRectF(QPointF(self.slide_rect_origin()), self.slide_size * self.preview_scale)
+        visible = slide_rect.intersected(QRectF(self.rect()))
+        return visible.isEmpty() or self._target_rect(self.region).adjusted(-1, -1, 1, 1).contains(visible)
+        
+    def paintEvent(self, event):
+        """Vẽ nền theo stylesheet rồi blit slide tại vị trí căn giữa + pan"""
+        super().paintEvent(event)
+        if self.slide_size is None:
+            return
+        
+        # Khi xem trước zoom, tile được scale nhanh (không làm mượt)
+        painter = QPainter(self)
+        visible = QRectF(event.rect())
+        for pixmap, rect in self.tiles:
+            target = self._target_rect(rect)
+            if target.intersects(visible):
+                painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+        painter.end()
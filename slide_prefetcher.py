@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class SlidePrefetcher:
+    """Render trước các slide lân cận trên thread pool"""
+    def __init__(self, render_func, total_slides, max_workers=2,
+                 min_ahead=2, max_ahead=8, fast_interval=0.35):
+        self.render_func = render_func  # Hàm render một slide vào cache
+        self.total_slides = total_slides
+        self.min_ahead = min_ahead  # Số slide render trước khi điều hướng chậm
+        self.max_ahead = max_ahead  # Số slide render trước tối đa khi cuộn nhanh
+        self.fast_interval = fast_interval  # Khoảng cách (giây) coi là điều hướng nhanh
+        
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="slide-prefetch")
+        self._lock = threading.RLock()  # Callback của Future có thể chạy khi đang giữ lock
+        self._futures = {}  # slide -> Future
+        self._wanted = set()  # Các slide còn cần render trước
+        
+        # Trạng thái điều hướng để điều chỉnh số slide render trước
+        self.direction = 1
+        self.ahead = min_ahead
+        self._last_slide = None
+        self._last_change = 0.0
+        
+    def slide_changed(self, slide):
+        """Cập nhật slide hiện tại và lên lịch render các slide lân cận"""
+        now = time.monotonic()
+        if self._last_slide is not None:
+            step = slide - self._last_slide
+            if abs(step) > 1:
+                # Nhảy xa (ví dụ kéo thanh trượt): hủy các job cũ
+                self.cancel_pending()
+                self.ahead = self.min_ahead
+            elif step != 0:
+                self.direction = 1 if step > 0 else -1
+                if now - self._last_change < self.fast_interval:
+                    # Điều hướng nhanh: tăng dần số slide render trước
+                    self.ahead = min(self.max_ahead, self.ahead * 2)
+                else:
+                    self.ahead = self.min_ahead
+        self._last_slide = slide
+        self._last_change = now
+        
+        self._schedule(self._targets(slide))
+        
+    def refresh(self):
+        """Lên lịch lại cho slide hiện tại (ví dụ khi scale render thay đổi)"""
+        if self._last_slide is not None:
+            self._schedule(self._targets(self._last_slide))
+            
+    def _targets(self, slide):
+        """Danh sách slide cần render trước, gần nhất trước"""
+        targets = []
+        for i in range(1, self.ahead + 1):
+            targets.append(slide + self.direction * i)
+            if i == 1:
+                # Giữ sẵn một slide theo hướng ngược lại
+                targets.append(slide - self.direction)
+        return [s for s in targets if 0 <= s < self.total_slides]
+        
+    def _schedule(self, targets):
+        """Hủy các job không còn cần và gửi job mới vào pool"""
+        with self._lock:
+            self._wanted = set(targets)
+            for slide, future in list(self._futures.items()):
+                if slide not in self._wanted:
+                    future.cancel()
+            
+            for slide in targets:
+                future = self._futures.get(slide)
+                if future is None or future.done():
+                    future = self.executor.submit(self._run, slide)
+                    self._futures[slide] = future
+                    future.add_done_callback(lambda f, s=slide: self._discard(s, f))
+            
+    def _run(self, slide):
+        """Job chạy trên worker thread"""
+        with self._lock:
+            if slide not in self._wanted:
+                return
+        self.render_func(slide)
+        
+    def _discard(self, slide, future):
+        """Bỏ job đã xong khỏi danh sách đang theo dõi"""
+        with self._lock:
+            if self._futures.get(slide) is future:
+                del self._futures[slide]
+            
+    def wait_for(self, slide):
+        """Chờ job render slide (nếu đang chạy) để tránh render hai lần"""
+        with self._lock:
+            future = self._futures.get(slide)
+        # Job chưa bắt đầu thì hủy để GUI thread tự render ngay
+        if future is not None and not future.cancel():
+            try:
+                future.result()
+            except Exception:
+                pass  # Job bị hủy hoặc lỗi: slide sẽ được render lại khi cần
+            
+    def cancel_pending(self):
+        """Hủy tất cả job chưa bắt đầu"""
+        with self._lock:
+            self._wanted = set()
+            for future in list(self._futures.values()):
+                future.cancel()
+            
+    def shutdown(self):
+        """Dừng thread pool"""
+        self.cancel_pending()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from array import array
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QPointF
+from PyQt6.QtGui import QPainter, QPen, QPixmap, QColor, QTransform
+
+class Stroke:
+    """Một nét vẽ: tọa độ chuẩn hóa theo slide (chia cho chiều rộng slide) lưu gọn trong array float32"""
+    __slots__ = ('xs', 'ys', 'color', 'width', 'min_distance')
+    
+    def __init__(self, color, width, min_distance=0.0):
+        self.xs = array('f')
+        self.ys = array('f')
+        self.color = QColor(color)
+        self.width = width  # Độ dày nét, cùng đơn vị chuẩn hóa với tọa độ
+        self.min_distance = min_distance  # Khoảng cách tối thiểu giữa hai điểm liên tiếp
+        
+    def __len__(self):
+        return len(self.xs)
+        
+    def last_point(self):
+        return QPointF(self.xs[-1], self.ys[-1])
+        
+    def add_point(self, point, force=False):
+        """Thêm điểm; bỏ qua nếu quá gần điểm trước (trừ khi force). Trả về True nếu đã thêm"""
+        x, y = point.x(), point.y()
+        if self.xs:
+            dx, dy = x - self.xs[-1], y - self.ys[-1]
+            if dx == 0 and dy == 0:
+                return False
+            if not force and dx * dx + dy * dy < self.min_distance * self.min_distance:
+                return False
+        self.xs.append(x)
+        self.ys.append(y)
+        return True
+        
+    def pen(self, scale=1.0):
+        """Bút vẽ của nét (đầu và góc tròn để đoạn vẽ dần khớp với khi vẽ lại cả nét)"""
+        return QPen(self.color, self.width * scale, Qt.PenStyle.SolidLine,
+                    Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
+        
+def draw_stroke(painter, stroke, transform):
+    """Vẽ cả nét theo transform (tọa độ chuẩn hóa -> pixel canvas, chỉ dịch và scale)"""
+    # Đổi sang pixel nguyên rồi drawLine từng đoạn: nhanh hơn nhiều so với drawPath dưới
+    # transform của painter (phải stroke cả path để tính các góc nối)
+    sx, sy, dx, dy = transform.m11(), transform.m22(), transform.dx(), transform.dy()
+    painter.setPen(stroke.pen(sx))
+    xs = [round(x * sx + dx) for x in stroke.xs]
+    ys = [round(y * sy + dy) for y in stroke.ys]
+    for i in range(1, len(xs)):
+        painter.drawLine(xs[i-1], ys[i-1], xs[i], ys[i])
+
+class StrokeHistory:
+    """Lịch sử nét vẽ có hoàn tác/làm lại, lưu ảnh checkpoint định kỳ để không phải vẽ lại từ đầu"""
+    def __init__(self, checkpoint_interval=20, max_checkpoints=8):
+        self.strokes = []  # Các nét đang hiển thị, theo thứ tự vẽ
+        self.redo_stack = []  # Các nét đã hoàn tác, có thể làm lại
+        self.checkpoint_interval = checkpoint_interval  # Lưu checkpoint sau mỗi N nét
+        self.max_checkpoints = max_checkpoints  # Giới hạn bộ nhớ dùng cho checkpoint
+        self._checkpoints = OrderedDict()  # số nét -> QPixmap canvas sau nét đó
+        self.transform = QTransform()  # Tọa độ chuẩn hóa -> pixel canvas của các checkpoint
+        
+    def __len__(self):
+        return len(self.strokes)
+        
+    def can_undo(self):
+        return bool(self.strokes)
+        
+    def can_redo(self):
+        return bool(self.redo_stack)
+        
+    def push(self, stroke, canvas):
+        """Thêm nét vừa vẽ xong (canvas đã có nét này)"""
+        self.strokes.append(stroke)
+        if self.redo_stack:
+            # Nhánh lịch sử mới: các nét đã hoàn tác và checkpoint sau đó không còn đúng
+            self.redo_stack.clear()
+            for count in [c for c in self._checkpoints if c >= len(self.strokes)]:
+                del self._checkpoints[count]
+        self._maybe_checkpoint(canvas)
+        
+    def undo(self, canvas):
+        """Bỏ nét cuối; vẽ lại canvas từ checkpoint gần nhất, trả về canvas mới"""
+        if not self.strokes:
+            return canvas
+        self.redo_stack.append(self.strokes.pop())
+        return self.rebuild(canvas.size(), self.transform)
+        
+    def redo(self, canvas):
+        """Vẽ lại nét vừa hoàn tác lên canvas (không cần vẽ lại các nét khác)"""
+        if not self.redo_stack:
+            return None
+        stroke = self.redo_stack.pop()
+        self.strokes.append(stroke)
+        
+        painter = QPainter(canvas)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        draw_stroke(painter, stroke, self.transform)
+        painter.end()
+        self._maybe_checkpoint(canvas)
+        return stroke
+        
+    def rebuild(self, size, transform):
+        """Tạo canvas kích thước size: checkpoint gần nhất rồi vẽ các nét sau đó theo transform"""
+        canvas = QPixmap(size)
+        canvas.fill(Qt.GlobalColor.transparent)
+        
+        if transform != self.transform:
+            # Zoom/pan đổi vị trí slide: checkpoint cũ không còn đúng, vẽ lại từ tọa độ chuẩn hóa
+            self._checkpoints.clear()
+            self.transform = QTransform(transform)
+        
+        start = 0
+        for count in self._checkpoints:
+            if start < count <= len(self.strokes):
+                start = count
+        
+        # Lưu lại checkpoint ở các mốc trong lúc vẽ lại (chỉ các mốc cuối, trong giới hạn
+        # max_checkpoints) để lần hoàn tác sau không phải vẽ lại từ đầu
+        count = len(self.strokes)
+        first_saved = count - self.max_checkpoints * self.checkpoint_interval
+        
+        painter = QPainter(canvas)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if start:
+            self._checkpoints.move_to_end(start)
+            painter.drawPixmap(0, 0, self._checkpoints[start])
+        for index in range(start, count):
+            draw_stroke(painter, self.strokes[index], self.transform)
+            done = index + 1
+            if done > first_saved and done % self.checkpoint_interval == 0 and done not in self._checkpoints:
+                painter.end()
+                self._save_checkpoint(done, canvas)
+                painter = QPainter(canvas)
+                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.end()
+        return canvas
+        
+    def drop_checkpoints(self):
+        """Bỏ các ảnh checkpoint để giải phóng bộ nhớ (vẫn giữ các nét)"""
+        self._checkpoints.clear()
+        
+    def clear(self):
+        """Xóa toàn bộ lịch sử và checkpoint"""
+        self.strokes.clear()
+        self.redo_stack.clear()
+        self._checkpoints.clear()
+        
+    def _maybe_checkpoint(self, canvas):
+        """Lưu checkpoint sau mỗi checkpoint_interval nét"""
+        count = len(self.strokes)
+        if count % self.checkpoint_interval or count in self._checkpoints:
+            return
+        self._save_checkpoint(count, canvas)
+        
+    def _save_checkpoint(self, count, canvas):
+        """Lưu ảnh canvas sau count nét, bỏ checkpoint dùng lâu nhất khi quá giới hạn"""
+        self._checkpoints[count] = canvas.copy()
+        while len(self._checkpoints) > self.max_checkpoints:
+            self._checkpoints.popitem(last=False)